@@ -1,7 +1,7 @@
 # ... (imports)
 import streamlit as st
 from utils.auth import get_authenticator
-from utils.database import init_db
+from utils.database import ensure_schema
 from utils.profiler import get_profiler_stats, scope_timer
 
 # Page configuration
@@ -16,8 +16,8 @@ st.set_page_config(
 if 'profiler_stats' in st.session_state:
     st.session_state['profiler_stats'] = {}
 
-# Initialize database
-init_db()
+# Initialize database (cached; runs the DDL check once per process)
+ensure_schema()
 
 # ... (authentication code remains the same until sidebar)
 
@@ -5,7 +5,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, date
 from utils.database import (
-    get_transactions,
+    get_transactions_df,
     get_date_range,
     get_budget_targets,
     get_finance_logs
@@ -77,15 +77,12 @@ else:
     date_from = None
     date_to = None
 
-transactions = get_transactions(date_from=date_from, date_to=date_to)
+df = get_transactions_df(date_from=date_from, date_to=date_to)
 
-if not transactions:
+if df.empty:
     st.info("📭 No transactions found for the selected date range.")
     st.stop()
 
-df = pd.DataFrame(transactions)
-df['date'] = pd.to_datetime(df['date'])
-
 # Current month budget stats
 current_month = datetime.now().strftime("%Y-%m")
 month_start, month_end = get_month_bounds(current_month)
@@ -93,13 +90,11 @@ month_from = month_start.strftime("%Y-%m-%d")
 month_to = month_end.strftime("%Y-%m-%d")
 
 budget_targets = get_budget_targets(current_month)
-monthly_transactions = get_transactions(date_from=month_from, date_to=month_to)
+month_df = get_transactions_df(date_from=month_from, date_to=month_to)
 
-if monthly_transactions:
-    month_df = pd.DataFrame(monthly_transactions)
+if not month_df.empty:
     month_total = month_df['amount'].sum()
 else:
-    month_df = pd.DataFrame(columns=['category', 'amount'])
     month_total = 0.0
 
 overall_budget = float(budget_targets.get(None, 0.0))
@@ -142,7 +142,7 @@ st.subheader("📋 Recent Transactions")
 from utils.database import get_transactions
 import pandas as pd
 
-recent_transactions = get_transactions()[:10]  # Get last 10
+recent_transactions = get_transactions(limit=10)  # Get last 10
 
 if recent_transactions:
     df = pd.DataFrame(recent_transactions)
@@ -3,8 +3,8 @@ from utils.auth import get_authenticator
 import os
 import tempfile
 import pandas as pd
-from utils.database import add_transaction
-from utils.ocr_parser import extract_transactions_from_image
+from utils.database import add_transactions
+from utils.ocr_parser import extract_transactions_from_images
 from utils.categorizer import auto_categorize, get_or_create_category
 
 # Page configuration
@@ -76,40 +76,49 @@ if st.button("🔄 Process Images", width="stretch", type="primary"):
         all_extracted_transactions = []
         extraction_errors = []
         
+        # Save every upload to a temp file first so OCR can run on all of them in parallel
+        saved_files = []  # (filename, temp_path)
         for uploaded_file in uploaded_files:
             temp_path = None
             try:
-                # Save uploaded file temporarily
                 suffix = "." + uploaded_file.name.split(".")[-1]
                 with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+                    temp_path = temp_file.name
                     file_bytes = uploaded_file.getbuffer()
                     temp_file.write(file_bytes)
-                    temp_path = temp_file.name
                     
                     # Store bytes for preview
                     st.session_state.source_images.append({
                         "name": uploaded_file.name,
                         "bytes": bytes(file_bytes)
                     })
-
-                # Extract transactions using OCR
-                success, transactions, error = extract_transactions_from_image(temp_path, bank_name=bank_choice)
-                
+                saved_files.append((uploaded_file.name, temp_path))
             except Exception as exc:
-                success = False
-                transactions = []
-                error = str(exc)
-            finally:
+                extraction_errors.append(f"{uploaded_file.name}: {exc}")
+                # Not in saved_files, so the cleanup below won't remove it
                 if temp_path and os.path.exists(temp_path):
                     os.remove(temp_path)
-
+        
+        try:
+            # Extract transactions using OCR, one worker process per image
+            results = extract_transactions_from_images(
+                [temp_path for _, temp_path in saved_files], bank_name=bank_choice
+            )
+        except Exception as exc:
+            results = [(False, [], str(exc))] * len(saved_files)
+        finally:
+            for _, temp_path in saved_files:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        
+        for (filename, _), (success, transactions, error) in zip(saved_files, results):
             if success:
                 all_extracted_transactions.append({
-                    'filename': uploaded_file.name,
+                    'filename': filename,
                     'transactions': transactions
                 })
             else:
-                extraction_errors.append(f"{uploaded_file.name}: {error}")
+                extraction_errors.append(f"{filename}: {error}")
         
         # Show extraction results
         if extraction_errors:
@@ -276,38 +285,24 @@ if 'preview_data' in st.session_state and st.session_state.preview_data:
             if len(st.session_state.preview_data) == 0:
                 st.error("❌ No transactions to save. Please upload files again.")
             else:
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                new_categories_created = []
-                
-                processed = 0
                 total = len(st.session_state.preview_data)
                 
-                for trans in st.session_state.preview_data:
-                    status_text.text(f"Saving: {trans['Description'][:40]}...")
-                    
-                    # Add transaction with edited values
-                    add_transaction(
-                        date=trans['Date'],
-                        description=trans['Description'],
-                        category=trans['Category'],
-                        amount=trans['Amount'],
-                        account=trans['Account'],
-                        source="statement_ocr"
-                    )
-                    
-                    # Track new categories
-                    if trans['Category'] not in new_categories_created and trans['Category'] != "Uncategorized":
-                        from utils.database import get_categories
-                        existing = get_categories()
-                        if trans['Category'] not in existing:
-                            new_categories_created.append(trans['Category'])
-                    
-                    processed += 1
-                    progress_bar.progress(processed / total)
+                # Save all transactions (with edited values) in one batch
+                with st.spinner(f"Saving {total} transaction(s)..."):
+                    add_transactions([
+                        (trans['Date'], trans['Description'], trans['Category'],
+                         trans['Amount'], trans['Account'], "statement_ocr")
+                        for trans in st.session_state.preview_data
+                    ])
                 
-                status_text.empty()
-                progress_bar.empty()
+                # Track new categories
+                from utils.database import get_categories
+                existing = set(get_categories())
+                new_categories_created = []
+                for trans in st.session_state.preview_data:
+                    category = trans['Category']
+                    if category != "Uncategorized" and category not in existing and category not in new_categories_created:
+                        new_categories_created.append(category)
                 
                 # Summary
                 st.divider()
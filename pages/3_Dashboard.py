@@ -5,7 +5,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from utils.database import (
-    get_transactions, get_categories, get_date_range,
+    get_transactions_df, get_categories, get_date_range,
     update_transaction, delete_transaction,
     get_merchant_mappings, add_merchant_mapping, delete_merchant_mapping, update_merchant_mapping,
     find_similar_transactions, bulk_update_category
@@ -87,20 +87,17 @@ else:
     date_from = None
     date_to = None
 
-transactions = get_transactions(
+df = get_transactions_df(
     date_from=date_from,
     date_to=date_to,
     categories=selected_categories if selected_categories else None,
     accounts=selected_accounts if selected_accounts else None
 )
 
-if not transactions:
+if df.empty:
     st.info("📭 No transactions found for the selected filters. Try adjusting your filters or add some expenses!")
     st.stop()
 
-# Convert to DataFrame
-df = pd.DataFrame(transactions)
-df['date'] = pd.to_datetime(df['date'])
 df['month'] = df['date'].dt.to_period('M').astype(str)
 
 # Key Metrics
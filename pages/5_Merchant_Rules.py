@@ -43,7 +43,11 @@ Learn from your transaction history to create rules that automatically categoriz
 # Learning Statistics
 st.subheader("📊 Learning Progress")
 
-stats = get_learning_stats()
+# Read transactions and rules once for both the stats and the suggestions below
+learning_transactions = get_transactions()
+learning_mappings = get_merchant_mappings()
+
+stats = get_learning_stats(transactions=learning_transactions, mappings=learning_mappings)
 
 col1, col2, col3, col4 = st.columns(4)
 
@@ -64,7 +68,10 @@ st.divider()
 # Suggested New Mappings
 st.subheader("💡 Suggested New Merchant Rules")
 
-suggestions = suggest_merchant_mappings(min_frequency=2, confidence_threshold=0.75)
+suggestions = suggest_merchant_mappings(
+    min_frequency=2, confidence_threshold=0.75,
+    transactions=learning_transactions, mappings=learning_mappings
+)
 
 if suggestions:
     st.info(f"Found {len(suggestions)} merchant(s) ready to be auto-categorized based on your transaction history")
@@ -6,6 +6,7 @@ from utils import database as db
 from utils.database import (
     get_categories,
     get_transactions,
+    get_transactions_df,
     get_budget_months,
     get_budget_targets,
     upsert_budget_target,
@@ -73,7 +74,7 @@ month_to = month_end.strftime("%Y-%m-%d")
 
 # Fetch budgets and transactions
 budget_targets = get_budget_targets(selected_month)
-transactions = get_transactions(date_from=month_from, date_to=month_to)
+df = get_transactions_df(date_from=month_from, date_to=month_to)
 
 # Budget setup
 st.subheader("💾 Set Monthly Budgets")
@@ -129,12 +130,9 @@ st.divider()
 # Build summary
 st.subheader("📊 Monthly Summary")
 
-if transactions:
-    df = pd.DataFrame(transactions)
-    df['date'] = pd.to_datetime(df['date'])
+if not df.empty:
     total_spent = df['amount'].sum()
 else:
-    df = pd.DataFrame(columns=['date', 'description', 'category', 'amount', 'account'])
     total_spent = 0.0
 
 col1, col2, col3 = st.columns(3)
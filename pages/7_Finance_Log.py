@@ -180,21 +180,16 @@ st.divider()
 
 st.subheader("📊 Finance History")
 
-logs = db.get_finance_logs()
+df = db.get_finance_logs_df()
 
-if not logs:
+if df.empty:
     st.info("No finance logs yet. Add your first log above.")
     st.stop()
 
-df = pd.DataFrame(logs)
-df['log_date'] = pd.to_datetime(df['log_date'])
 df['growth_rate'] = df['net_worth'].pct_change() * 100
 
 log_ids = df['id'].tolist()
-items_df = pd.DataFrame()
-if hasattr(db, "get_finance_log_items"):
-    items = db.get_finance_log_items(log_ids)
-    items_df = pd.DataFrame(items)
+items_df = db.get_finance_log_items_df(log_ids)
 
 history = pd.DataFrame({
     "Date": df['log_date'].dt.strftime("%Y-%m-%d"),
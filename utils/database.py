@@ -1,21 +1,54 @@
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
+import pandas as pd
 import streamlit as st
 import psycopg2
 from psycopg2 import pool, extras
 from psycopg2.extras import RealDictCursor
 import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from contextlib import contextmanager
+from functools import lru_cache, partial
+from itertools import count
+
+# Aho-Corasick matcher for merchant patterns (optional, falls back to substring scans)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Session settings applied to every pooled connection at connect time.
+# synchronous_commit=off lets COMMIT return before the WAL is flushed to disk;
+# a crash can lose the last few commits but never corrupts data.
+# lock_timeout makes a blocked writer fail fast instead of hanging a rerun,
+# and temp_buffers/work_mem keep sorts and temp tables in memory.
+SESSION_SETTINGS = {
+    "synchronous_commit": "off",
+    "lock_timeout": "5s",
+    "work_mem": "16MB",
+    "temp_buffers": "16MB",
+}
+
+def _session_options() -> str:
+    """Build the libpq `options` string for SESSION_SETTINGS."""
+    return " ".join(f"-c {name}={value}" for name, value in SESSION_SETTINGS.items())
 
 # Cache the connection pool so it persists across reruns
 @st.cache_resource
 def init_connection_pool():
     """Initialize the connection pool."""
     from utils.profiler import scope_timer
+    global _PREPARE_STATEMENTS
     
     with scope_timer('DB Connection Init'):
         try:
             secrets = st.secrets["postgres"]
+            _PREPARE_STATEMENTS = bool(secrets.get("prepared_statements", False))
             return psycopg2.pool.ThreadedConnectionPool(
                 minconn=1,
                 maxconn=10,
@@ -24,12 +57,17 @@ def init_connection_pool():
                 dbname=secrets["dbname"],
                 user=secrets["user"],
                 password=secrets["password"],
+                options=_session_options(),
                 cursor_factory=RealDictCursor
             )
         except Exception as e:
             st.error(f"Failed to connect to PostgreSQL: {e}")
             st.stop()
 
+# Connections used within this many seconds skip the SELECT 1 health check
+HEALTH_CHECK_INTERVAL = 30.0
+_conn_last_used = weakref.WeakKeyDictionary()
+
 @contextmanager
 def get_db_connection():
     """
@@ -40,18 +78,21 @@ def get_db_connection():
     db_pool = init_connection_pool()
     conn = db_pool.getconn()
     try:
-        # Health check: verify connection is alive
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
-        except psycopg2.OperationalError:
-            # Connection is dead; close it and get a fresh one
-            db_pool.putconn(conn, close=True)
-            conn = db_pool.getconn()
+        # Health check: verify connection is alive, unless it was used recently
+        last_used = _conn_last_used.get(conn)
+        if conn.closed or last_used is None or time.monotonic() - last_used > HEALTH_CHECK_INTERVAL:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                # Connection is dead; close it and get a fresh one
+                db_pool.putconn(conn, close=True)
+                conn = db_pool.getconn()
         
         yield conn
         
         # Return to pool if successful
+        _conn_last_used[conn] = time.monotonic()
         db_pool.putconn(conn)
         
     except Exception as e:
@@ -70,34 +111,139 @@ DATA_DIR = os.path.join(BASE_DIR, "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 OVERALL_BUDGET_CATEGORY = "__overall__"
 
+# Max candidates fetched through the full-text index before fuzzy scoring
+SIMILAR_CANDIDATE_LIMIT = 500
+# Descriptions are indexed as runs of letters/digits so SQL and Python tokenize alike
+_FTS_DOCUMENT = "to_tsvector('simple', regexp_replace(description, '[^[:alnum:]]+', ' ', 'g'))"
+_FTS_TOKEN_RE = re.compile(r'[^\W_]+')
+
+# Merchant mapping snapshot: (mappings, automaton, memoized lookup), where
+# mappings are (pattern, pattern words, category). Published as one tuple so a
+# reader never pairs one table with another table's automaton or results.
+# Rebuilt lazily after any add/delete/update of a mapping.
+_MAPPINGS_SNAPSHOT: Optional[tuple] = None
+_MAPPINGS_GENERATION = 0
+_MAPPINGS_LOCK = threading.Lock()
+
 def get_placeholder():
     """Return the placeholder for the current database type."""
     # Always Postgres now
     return "%s"
 
+# Static statements built once at import, so hot paths skip per-call
+# f-string formatting and always send the same SQL text.
+_PH = get_placeholder()
+
+_SQL_INSERT_TRANSACTION = f"""
+    INSERT INTO transactions (date, description, category, amount, account, source)
+    VALUES ({_PH}, {_PH}, {_PH}, {_PH}, {_PH}, {_PH})
+    RETURNING id
+"""
+_SQL_UPDATE_TRANSACTION = f"""
+    UPDATE transactions
+    SET date = {_PH}, description = {_PH}, category = {_PH}, amount = {_PH}, account = {_PH}, source = {_PH}
+    WHERE id = {_PH}
+"""
+_SQL_UPDATE_TRANSACTION_CATEGORY = f"UPDATE transactions SET category = {_PH} WHERE id = {_PH}"
+_SQL_DELETE_TRANSACTION = f"DELETE FROM transactions WHERE id = {_PH}"
+_SQL_UPSERT_BUDGET = f"""
+    INSERT INTO budget_targets (month, category, amount)
+    VALUES ({_PH}, {_PH}, {_PH})
+    ON CONFLICT(month, category) DO UPDATE SET
+        amount = excluded.amount,
+        updated_at = CURRENT_TIMESTAMP
+"""
+_SQL_DELETE_BUDGET = f"DELETE FROM budget_targets WHERE month = {_PH} AND category = {_PH}"
+_SQL_UPSERT_MERCHANT_MAPPING = f"""
+    INSERT INTO merchant_mappings (merchant_pattern, category)
+    VALUES ({_PH}, {_PH})
+    ON CONFLICT(merchant_pattern) DO UPDATE SET category = excluded.category
+"""
+
+# The fixed statements above are the only ones run through server-side
+# prepared statements; they hold no literals, so every %s is a parameter
+_PREPARED_QUERIES = frozenset({
+    _SQL_INSERT_TRANSACTION, _SQL_UPDATE_TRANSACTION, _SQL_UPDATE_TRANSACTION_CATEGORY,
+    _SQL_DELETE_TRANSACTION, _SQL_UPSERT_BUDGET, _SQL_DELETE_BUDGET,
+    _SQL_UPSERT_MERCHANT_MAPPING,
+})
+# Opt-in with `prepared_statements = true` under [postgres] in the secrets.
+# Transaction-mode poolers (e.g. Supabase on port 6543) hand each transaction
+# a different server connection, where the PREPAREd statement does not exist
+_PREPARE_STATEMENTS = False
+# Prepared statements kept per pooled connection; the least recently used is DEALLOCATEd
+MAX_PREPARED_PER_CONNECTION = 16
+# Per pooled connection: (OrderedDict {query: name}, statement name counter)
+_prepared_statements = weakref.WeakKeyDictionary()
+_PLACEHOLDER_RE = re.compile(r'%s')
+
+def _execute_prepared(conn, cursor, query: str, params: tuple = None) -> None:
+    """
+    Execute one of the _PREPARED_QUERIES through a server-side prepared statement.
+    The statement is PREPAREd once per connection and reused by EXECUTE,
+    so Postgres skips parsing and planning on repeat calls. Any other query,
+    or any query when prepared statements are off, runs with a plain execute.
+    """
+    if not _PREPARE_STATEMENTS or query not in _PREPARED_QUERIES:
+        cursor.execute(query, params)
+        return
+    
+    statements, counter = _prepared_statements.setdefault(conn, (OrderedDict(), count(1)))
+    name = statements.get(query)
+    if name is None:
+        if len(statements) >= MAX_PREPARED_PER_CONNECTION:
+            _, evicted = statements.popitem(last=False)
+            cursor.execute(f"DEALLOCATE {evicted}")
+        name = f"stmt_{next(counter)}"
+        placeholders = count(1)
+        body = _PLACEHOLDER_RE.sub(lambda _: f"${next(placeholders)}", query)
+        cursor.execute(f"PREPARE {name} AS {body}")
+        statements[query] = name
+    else:
+        statements.move_to_end(query)
+    
+    if params:
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cursor.execute(f"EXECUTE {name}")
+
 def execute_query(query: str, params: tuple = None, fetch_one: bool = False, fetch_all: bool = False) -> any:
-    """Helper to execute a query and handle commit/close."""
+    """Helper to execute a query and handle commit/rollback."""
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute(query, params)
+        # `with conn` commits when the block succeeds and rolls back if it raises.
+        # If it's a SELECT, the commit does nothing (harmless).
+        with conn, conn.cursor() as cursor:
+            _execute_prepared(conn, cursor, query, params)
             
             result = None
             if fetch_one:
                 result = cursor.fetchone()
             elif fetch_all:
                 result = cursor.fetchall()
-            
-            # Commit is needed for modifying queries. 
-            # If it's a SELECT, commit does nothing (harmless).
-            conn.commit()
-            
-            return result
+        
+        return result
+
+# Bump whenever the DDL in init_db changes so existing databases re-run it
+SCHEMA_VERSION = 2
+
+def _schema_is_current(cursor) -> bool:
+    """Check the schema_meta version without touching any other table."""
+    cursor.execute("SELECT to_regclass('schema_meta') IS NOT NULL AS present")
+    if not cursor.fetchone()['present']:
+        return False
+    cursor.execute("SELECT MAX(version) AS version FROM schema_meta")
+    version = cursor.fetchone()['version']
+    return version is not None and version >= SCHEMA_VERSION
 
 def init_db():
-    """Initialize the database with required tables."""
+    """Initialize the database with required tables. Skips the DDL when the schema is current."""
     # Use context manager
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
+            if _schema_is_current(cursor):
+                conn.rollback()
+                return
+            
             pk_def = "SERIAL PRIMARY KEY"
             text_type = "TEXT"
 
@@ -114,6 +260,26 @@ def init_db():
                     created_at {text_type} DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+
+            # Uppercased description kept by Postgres, so fuzzy matching
+            # doesn't have to call .upper() on every row
+            cursor.execute("""
+                ALTER TABLE transactions ADD COLUMN IF NOT EXISTS description_norm TEXT
+                GENERATED ALWAYS AS (UPPER(description)) STORED
+            """)
+
+            # Indexes for the columns get_transactions filters and sorts on
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_date ON transactions (date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_category ON transactions (category)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_account ON transactions (account)")
+            # Expression index matching get_transaction_months' substr(date, 1, 7),
+            # so the distinct months come from the index in order
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_month ON transactions ((substr(date, 1, 7)))")
+            # Full-text index used to pick candidates for find_similar_transactions
+            cursor.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_tx_description_fts
+                ON transactions USING GIN (({_FTS_DOCUMENT}))
+            """)
             
             # Create categories table
             cursor.execute(f"""
@@ -169,6 +335,8 @@ def init_db():
                     amount REAL NOT NULL
                 )
             """)
+            # Postgres does not index foreign keys; items are always read by log_id
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_finance_items_log_id ON finance_log_items (log_id)")
 
             # Create finance_current_items table (for the entry form state)
             cursor.execute(f"""
@@ -192,70 +360,167 @@ def init_db():
                 )
             """)
 
+            # Record the schema version last, so a failed init re-runs next time
+            cursor.execute("CREATE TABLE IF NOT EXISTS schema_meta (version INTEGER NOT NULL)")
+            cursor.execute("DELETE FROM schema_meta")
+            cursor.execute("INSERT INTO schema_meta (version) VALUES (%s)", (SCHEMA_VERSION,))
+
             conn.commit()
 
-# Ensure schema exists on import (safe with IF NOT EXISTS)
-init_db()
+@st.cache_resource(show_spinner=False)
+def ensure_schema() -> bool:
+    """Run init_db once per server process; later calls and re-imports are free."""
+    init_db()
+    return True
+
+# Ensure schema exists on import. Pages can be opened directly without app.py
+# running first, so the import still triggers it, but only the first one does work.
+ensure_schema()
 
 # ============= TRANSACTION OPERATIONS =============
 
 def add_transaction(date: str, description: str, category: str, 
                    amount: float, account: str, source: str) -> int:
     """Add a new transaction to the database."""
+    with get_db_connection() as conn:
+        with conn, conn.cursor() as cursor:
+            _execute_prepared(
+                conn, cursor, _SQL_INSERT_TRANSACTION,
+                (date, description, category, float(amount), account, source)
+            )
+            transaction_id = cursor.fetchone()['id']
+        
+        st.cache_data.clear()
+        return transaction_id
+
+def add_transactions(rows: List[Tuple[str, str, str, float, str, str]]) -> int:
+    """
+    Add several transactions in one statement and one commit.
+    Each row is (date, description, category, amount, account, source).
+    Returns the number of transactions inserted.
+    """
+    if not rows:
+        return 0
+    
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
-            ph = get_placeholder()
-            
-            cursor.execute(f"""
+            extras.execute_values(
+                cursor,
+                """
                 INSERT INTO transactions (date, description, category, amount, account, source)
-                VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph})
-                RETURNING id
-            """, (date, description, category, float(amount), account, source))
-            transaction_id = cursor.fetchone()['id']
+                VALUES %s
+                """,
+                [(date, description, category, float(amount), account, source)
+                 for date, description, category, amount, account, source in rows],
+                page_size=1000
+            )
             
             conn.commit()
             st.cache_data.clear()
-            return transaction_id
+            return len(rows)
+
+def _rows_to_dicts(cursor, rows: List[tuple]) -> List[Dict]:
+    """
+    Turn plain tuple rows into dicts, reading the column names once.
+    Cheaper than RealDictCursor, which builds a dict-like row object per row.
+    """
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in rows]
+
+def _frame_from_cursor(cursor) -> pd.DataFrame:
+    """Build a DataFrame column-wise from an executed plain tuple cursor."""
+    columns = [col[0] for col in cursor.description]
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+# Columns the pages actually use; created_at is never read back and the
+# internal description_norm is not returned to callers
+_TRANSACTION_COLUMNS = "id, date, description, category, amount, account, source"
+
+def _build_transactions_query(date_from: Optional[str] = None,
+                              date_to: Optional[str] = None,
+                              categories: Optional[List[str]] = None,
+                              accounts: Optional[List[str]] = None,
+                              limit: Optional[int] = None,
+                              offset: int = 0) -> Tuple[str, tuple]:
+    """Build the filtered transactions SELECT and its parameters."""
+    ph = get_placeholder()
+    query = f"SELECT {_TRANSACTION_COLUMNS} FROM transactions WHERE 1=1"
+    params = []
+    
+    if date_from:
+        query += f" AND date >= {ph}"
+        params.append(date_from)
+    
+    if date_to:
+        query += f" AND date <= {ph}"
+        params.append(date_to)
+    
+    if categories:
+        placeholders = ','.join([ph] * len(categories))
+        query += f" AND category IN ({placeholders})"
+        params.extend(categories)
+    
+    if accounts:
+        placeholders = ','.join([ph] * len(accounts))
+        query += f" AND account IN ({placeholders})"
+        params.extend(accounts)
+    
+    # id breaks ties so pages are stable
+    query += " ORDER BY date DESC, id DESC"
+    
+    if limit is not None:
+        query += f" LIMIT {ph} OFFSET {ph}"
+        params.extend([int(limit), int(offset)])
+    
+    return query, tuple(params)
 
 @st.cache_data(ttl=60, show_spinner=False)
 def get_transactions(date_from: Optional[str] = None, 
                      date_to: Optional[str] = None,
                      categories: Optional[List[str]] = None,
-                     accounts: Optional[List[str]] = None) -> List[Dict]:
-    """Get transactions with optional filters."""
+                     accounts: Optional[List[str]] = None,
+                     limit: Optional[int] = None,
+                     offset: int = 0) -> List[Dict]:
+    """Get transactions with optional filters, newest first. Pass `limit`/`offset` to page."""
     from utils.profiler import scope_timer
     
     with scope_timer('Fetch Transactions'):
         with get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                ph = get_placeholder()
-                query = "SELECT * FROM transactions WHERE 1=1"
-                params = []
-                
-                if date_from:
-                    query += f" AND date >= {ph}"
-                    params.append(date_from)
-                
-                if date_to:
-                    query += f" AND date <= {ph}"
-                    params.append(date_to)
-                
-                if categories:
-                    placeholders = ','.join([ph] * len(categories))
-                    query += f" AND category IN ({placeholders})"
-                    params.extend(categories)
-                
-                if accounts:
-                    placeholders = ','.join([ph] * len(accounts))
-                    query += f" AND account IN ({placeholders})"
-                    params.extend(accounts)
-                
-                query += " ORDER BY date DESC"
-                
-                cursor.execute(query, tuple(params))
+            with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                query, params = _build_transactions_query(
+                    date_from, date_to, categories, accounts, limit, offset
+                )
+                cursor.execute(query, params)
                 
                 rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                return _rows_to_dicts(cursor, rows)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_transactions_df(date_from: Optional[str] = None,
+                        date_to: Optional[str] = None,
+                        categories: Optional[List[str]] = None,
+                        accounts: Optional[List[str]] = None,
+                        limit: Optional[int] = None,
+                        offset: int = 0) -> pd.DataFrame:
+    """
+    Get transactions with optional filters as a DataFrame. Pass `limit`/`offset` to page.
+    Rows are read as plain tuples and built column-wise, skipping the per-row dicts.
+    The `date` column is parsed to datetime.
+    """
+    from utils.profiler import scope_timer
+    
+    with scope_timer('Fetch Transactions (DataFrame)'):
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                query, params = _build_transactions_query(
+                    date_from, date_to, categories, accounts, limit, offset
+                )
+                cursor.execute(query, params)
+                
+                df = _frame_from_cursor(cursor)
+    
+    df['date'] = pd.to_datetime(df['date'])
+    return df
 
 @st.cache_data(ttl=60, show_spinner=False)
 def get_dashboard_stats() -> Dict:
@@ -278,17 +543,14 @@ def get_dashboard_stats() -> Dict:
 def delete_transaction(transaction_id: int) -> bool:
     """Delete a transaction by ID."""
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
-            ph = get_placeholder()
-            cursor.execute(f"DELETE FROM transactions WHERE id = {ph}", (int(transaction_id),))
-            
+        with conn, conn.cursor() as cursor:
+            _execute_prepared(conn, cursor, _SQL_DELETE_TRANSACTION, (int(transaction_id),))
             deleted = cursor.rowcount > 0
-            conn.commit()
-            
-            if deleted:
-                st.cache_data.clear()
-            
-            return deleted
+        
+        if deleted:
+            st.cache_data.clear()
+        
+        return deleted
 
 def update_transaction(
     transaction_id: int,
@@ -301,25 +563,19 @@ def update_transaction(
 ) -> bool:
     """Update all editable fields for a transaction."""
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
-            ph = get_placeholder()
-            cursor.execute(
-                f"""
-                UPDATE transactions
-                SET date = {ph}, description = {ph}, category = {ph}, amount = {ph}, account = {ph}, source = {ph}
-                WHERE id = {ph}
-                """,
+        with conn, conn.cursor() as cursor:
+            _execute_prepared(
+                conn, cursor, _SQL_UPDATE_TRANSACTION,
                 (date, description, category, float(amount), account, source, int(transaction_id))
             )
-
             updated = cursor.rowcount > 0
-            conn.commit()
-            
-            if updated:
-                st.cache_data.clear()
-            
-            return updated
+        
+        if updated:
+            st.cache_data.clear()
+        
+        return updated
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_date_range() -> Tuple[Optional[str], Optional[str]]:
     """Get the min and max dates from transactions."""
     with get_db_connection() as conn:
@@ -332,11 +588,26 @@ def get_date_range() -> Tuple[Optional[str], Optional[str]]:
                 return row['min_date'], row['max_date']
             return None, None
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_transaction_months() -> List[str]:
     """Get distinct months (YYYY-MM) that have transactions."""
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT DISTINCT substr(date, 1, 7) AS month FROM transactions ORDER BY month DESC")
+            # Walk idx_tx_month from the newest month down, one index probe per
+            # distinct month, instead of scanning every row for DISTINCT
+            cursor.execute("""
+                WITH RECURSIVE months AS (
+                    SELECT MAX(substr(date, 1, 7)) AS month FROM transactions
+                    UNION ALL
+                    SELECT (
+                        SELECT MAX(substr(date, 1, 7)) FROM transactions
+                        WHERE substr(date, 1, 7) < months.month
+                    )
+                    FROM months WHERE months.month IS NOT NULL
+                )
+                SELECT month FROM months WHERE month IS NOT NULL
+                ORDER BY month DESC
+            """)
             rows = cursor.fetchall()
             return [row['month'] for row in rows]
 
@@ -350,10 +621,12 @@ def add_category(name: str) -> bool:
                 ph = get_placeholder()
                 cursor.execute(f"INSERT INTO categories (name) VALUES ({ph})", (name,))
                 conn.commit()
+                get_categories.clear()
                 return True
     except Exception: # sqlite3.IntegrityError or psycopg2.IntegrityError
         return False
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_categories() -> List[str]:
     """Get all categories."""
     with get_db_connection() as conn:
@@ -374,15 +647,18 @@ def update_category(old_name: str, new_name: str) -> bool:
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
                 ph = get_placeholder()
-                # Update category name
-                cursor.execute(f"UPDATE categories SET name = {ph} WHERE name = {ph}", 
-                              (new_name, old_name))
-                
-                # Update all transactions with this category
-                cursor.execute(f"UPDATE transactions SET category = {ph} WHERE category = {ph}",
-                              (new_name, old_name))
+                # Rename the category and every transaction using it in one
+                # statement (one round trip, one snapshot); the transaction
+                # side is an index lookup on idx_tx_category
+                cursor.execute(f"""
+                    WITH renamed AS (
+                        UPDATE categories SET name = {ph} WHERE name = {ph}
+                    )
+                    UPDATE transactions SET category = {ph} WHERE category = {ph}
+                """, (new_name, old_name, new_name, old_name))
                 
                 conn.commit()
+                st.cache_data.clear()
                 return True
     except Exception:
         return False
@@ -390,54 +666,52 @@ def update_category(old_name: str, new_name: str) -> bool:
 def delete_category(name: str) -> Tuple[bool, str]:
     """Delete a category if not used in transactions."""
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
+        with conn, conn.cursor() as cursor:
             ph = get_placeholder()
-            # Check if category is used
-            cursor.execute(f"SELECT COUNT(*) as count FROM transactions WHERE category = {ph}", (name,))
-            
-            count = cursor.fetchone()['count']
-                
-            if count > 0:
-                return False, f"Cannot delete category '{name}' - it's used in {count} transaction(s)"
-            
-            cursor.execute(f"DELETE FROM categories WHERE name = {ph}", (name,))
-            
-            deleted = cursor.rowcount > 0
-            conn.commit()
+            # Delete only if unused, in one statement
+            cursor.execute(f"""
+                DELETE FROM categories
+                WHERE name = {ph}
+                  AND NOT EXISTS (SELECT 1 FROM transactions WHERE category = {ph})
+            """, (name, name))
             
-            if deleted:
-                return True, f"Category '{name}' deleted successfully"
+            if cursor.rowcount > 0:
+                deleted = True
             else:
-                return False, f"Category '{name}' not found"
+                # Nothing deleted: count usages only to explain why
+                cursor.execute(f"SELECT COUNT(*) as count FROM transactions WHERE category = {ph}", (name,))
+                count = cursor.fetchone()['count']
+                deleted = False
+        
+        if deleted:
+            get_categories.clear()
+            return True, f"Category '{name}' deleted successfully"
+        if count > 0:
+            return False, f"Cannot delete category '{name}' - it's used in {count} transaction(s)"
+        return False, f"Category '{name}' not found"
 
 # ============= BUDGET OPERATIONS =============
 
+def _invalidate_budget_cache() -> None:
+    """Drop cached budget reads after a budget write."""
+    get_budget_targets.clear()
+    get_budget_months.clear()
+
 def upsert_budget_target(month: str, category: Optional[str], amount: float) -> bool:
     """Insert or update a monthly budget target for a category or overall."""
     category_value = category if category is not None else OVERALL_BUDGET_CATEGORY
-    
-    ph = get_placeholder()
-    
-    return execute_query(
-        f"""
-        INSERT INTO budget_targets (month, category, amount)
-        VALUES ({ph}, {ph}, {ph})
-        ON CONFLICT(month, category) DO UPDATE SET
-            amount = excluded.amount,
-            updated_at = CURRENT_TIMESTAMP
-        """,
-        (month, category_value, float(amount))
-    )
+    result = execute_query(_SQL_UPSERT_BUDGET, (month, category_value, float(amount)))
+    _invalidate_budget_cache()
+    return result
 
 def delete_budget_target(month: str, category: Optional[str]) -> bool:
     """Delete a monthly budget target for a category or overall."""
     category_value = category if category is not None else OVERALL_BUDGET_CATEGORY
-    ph = get_placeholder()
-    return execute_query(
-        f"DELETE FROM budget_targets WHERE month = {ph} AND category = {ph}",
-        (month, category_value)
-    )
+    result = execute_query(_SQL_DELETE_BUDGET, (month, category_value))
+    _invalidate_budget_cache()
+    return result
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_budget_targets(month: str) -> Dict[Optional[str], float]:
     """Get all budget targets for a given month."""
     with get_db_connection() as conn:
@@ -456,6 +730,7 @@ def get_budget_targets(month: str) -> Dict[Optional[str], float]:
 
             return targets
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_budget_months() -> List[str]:
     """Get distinct months (YYYY-MM) that have budget targets."""
     with get_db_connection() as conn:
@@ -512,22 +787,15 @@ def add_finance_log_with_items(
                 """, (log_date, total_assets, total_debt, net_worth))
                 log_id = cursor.fetchone()['id']
 
-                if asset_items:
-                    cursor.executemany(
-                        f"""
-                        INSERT INTO finance_log_items (log_id, item_type, name, amount)
-                        VALUES ({ph}, 'asset', {ph}, {ph})
-                        """,
-                        [(log_id, name, float(amount)) for name, amount in asset_items]
-                    )
-
-                if debt_items:
-                    cursor.executemany(
-                        f"""
-                        INSERT INTO finance_log_items (log_id, item_type, name, amount)
-                        VALUES ({ph}, 'debt', {ph}, {ph})
-                        """,
-                        [(log_id, name, float(amount)) for name, amount in debt_items]
+                # Assets and debts go in as one multi-row INSERT
+                item_rows = [(log_id, 'asset', name, float(amount)) for name, amount in asset_items or []]
+                item_rows += [(log_id, 'debt', name, float(amount)) for name, amount in debt_items or []]
+                if item_rows:
+                    extras.execute_values(
+                        cursor,
+                        "INSERT INTO finance_log_items (log_id, item_type, name, amount) VALUES %s",
+                        item_rows,
+                        page_size=1000
                     )
 
                 conn.commit()
@@ -544,7 +812,7 @@ def get_finance_logs() -> List[Dict]:
     from utils.profiler import scope_timer
     with scope_timer('Fetch Finance Logs'):
         with get_db_connection() as conn:
-            with conn.cursor() as cursor:
+            with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
                 cursor.execute("""
                     SELECT id, log_date, total_assets, total_debt, net_worth, created_at
                     FROM finance_logs
@@ -552,7 +820,7 @@ def get_finance_logs() -> List[Dict]:
                 """)
 
                 rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                return _rows_to_dicts(cursor, rows)
 
 def get_finance_log_items(log_ids: List[int]) -> List[Dict]:
     """Get all finance log items for the given log IDs."""
@@ -560,7 +828,7 @@ def get_finance_log_items(log_ids: List[int]) -> List[Dict]:
         return []
 
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
             ph = get_placeholder()
             # Postgres requires slightly different syntax for IN clause with tuple?
             # No, standard SQL IN (val1, val2) works.
@@ -586,7 +854,40 @@ def get_finance_log_items(log_ids: List[int]) -> List[Dict]:
 
             rows = cursor.fetchall()
             
-            return [dict(row) for row in rows]
+            return _rows_to_dicts(cursor, rows)
+
+@st.cache_data(show_spinner=False)
+def get_finance_logs_df() -> pd.DataFrame:
+    """Get all finance logs ordered by date ascending as a DataFrame, with `log_date` parsed."""
+    from utils.profiler import scope_timer
+    with scope_timer('Fetch Finance Logs (DataFrame)'):
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                cursor.execute("""
+                    SELECT id, log_date, total_assets, total_debt, net_worth, created_at
+                    FROM finance_logs
+                    ORDER BY log_date ASC, id ASC
+                """)
+                df = _frame_from_cursor(cursor)
+
+    df['log_date'] = pd.to_datetime(df['log_date'])
+    return df
+
+def get_finance_log_items_df(log_ids: List[int]) -> pd.DataFrame:
+    """Get all finance log items for the given log IDs as a DataFrame."""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            ph = get_placeholder()
+            cursor.execute(
+                f"""
+                SELECT id, log_id, item_type, name, amount
+                FROM finance_log_items
+                WHERE log_id = ANY({ph})
+                ORDER BY log_id ASC, item_type ASC, name ASC
+                """,
+                ([int(log_id) for log_id in log_ids],)
+            )
+            return _frame_from_cursor(cursor)
 
 def delete_finance_log(log_id: int) -> bool:
     """Delete a finance log and its related items."""
@@ -605,27 +906,30 @@ def delete_finance_log(log_id: int) -> bool:
             return deleted
 
 def replace_finance_current_items(item_type: str, items: List[Tuple[str, float]]) -> None:
-    """Replace current finance items for a given type (asset or debt)."""
+    """Replace current finance items for a given type (asset or debt) in a single transaction."""
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
+        # Commits on success; any failure rolls back the DELETE too
+        with conn, conn.cursor() as cursor:
             ph = get_placeholder()
             cursor.execute(f"DELETE FROM finance_current_items WHERE item_type = {ph}", (item_type,))
 
             if items:
-                cursor.executemany(
-                    f"""
+                # One multi-row INSERT instead of a statement per item
+                extras.execute_values(
+                    cursor,
+                    """
                     INSERT INTO finance_current_items (item_type, name, amount, updated_at)
-                    VALUES ({ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
+                    VALUES %s
                     """,
-                    [(item_type, name, amount) for name, amount in items]
+                    [(item_type, name, amount) for name, amount in items],
+                    template="(%s, %s, %s, CURRENT_TIMESTAMP)",
+                    page_size=1000
                 )
 
-            conn.commit()
-
 def get_finance_current_items(item_type: str) -> List[Dict]:
     """Get current finance items for a given type (asset or debt)."""
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
             ph = get_placeholder()
             cursor.execute(
                 f"""
@@ -639,21 +943,20 @@ def get_finance_current_items(item_type: str) -> List[Dict]:
 
             rows = cursor.fetchall()
 
-            return [dict(row) for row in rows]
+            return _rows_to_dicts(cursor, rows)
 
 def update_transaction_category(transaction_id: int, new_category: str) -> bool:
     """Update a transaction's category."""
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
-            ph = get_placeholder()
-            cursor.execute(
-                f"UPDATE transactions SET category = {ph} WHERE id = {ph}",
-                (new_category, transaction_id)
-            )
+            _execute_prepared(conn, cursor, _SQL_UPDATE_TRANSACTION_CATEGORY, (new_category, transaction_id))
             
             updated = cursor.rowcount > 0
             conn.commit()
             
+            if updated:
+                st.cache_data.clear()
+            
             return updated
 
 # ============= MERCHANT MAPPING OPERATIONS =============
@@ -663,59 +966,165 @@ def add_merchant_mapping(merchant_pattern: str, category: str) -> bool:
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
-                ph = get_placeholder()
-                cursor.execute(f"""
-                    INSERT INTO merchant_mappings (merchant_pattern, category)
-                    VALUES ({ph}, {ph})
-                    ON CONFLICT(merchant_pattern) DO UPDATE SET category = excluded.category
-                """, (merchant_pattern.upper(), category))
+                _execute_prepared(conn, cursor, _SQL_UPSERT_MERCHANT_MAPPING, (merchant_pattern.upper(), category))
                 conn.commit()
+                _invalidate_merchant_mappings_cache()
                 return True
     except Exception as e:
         print(f"Error adding merchant mapping: {e}")
         return False
 
+def add_merchant_mappings_bulk(mappings: List[Tuple[str, str]]) -> int:
+    """
+    Add several (merchant_pattern, category) mappings in one statement and transaction.
+    Patterns that already have a mapping are left unchanged.
+    Returns the number of mappings actually inserted.
+    """
+    if not mappings:
+        return 0
+    
+    with get_db_connection() as conn:
+        with conn, conn.cursor() as cursor:
+            # RETURNING counts inserted rows across all pages (rowcount only sees the last)
+            inserted = extras.execute_values(
+                cursor,
+                """
+                INSERT INTO merchant_mappings (merchant_pattern, category)
+                VALUES %s
+                ON CONFLICT(merchant_pattern) DO NOTHING
+                RETURNING 1
+                """,
+                [(pattern.upper(), category) for pattern, category in mappings],
+                page_size=1000,
+                fetch=True
+            )
+    
+    if inserted:
+        _invalidate_merchant_mappings_cache()
+    return len(inserted)
+
+@st.cache_data(ttl=60, show_spinner=False)
 def get_merchant_mappings() -> List[Dict]:
     """Get all merchant mappings."""
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
             cursor.execute("""
-                SELECT id, merchant_pattern, category, created_at, last_used
+                SELECT merchant_pattern, category, created_at, last_used
                 FROM merchant_mappings
                 ORDER BY last_used DESC
             """)
             rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return _rows_to_dicts(cursor, rows)
     
-def get_merchant_mapping_for_description(description: str) -> Optional[str]:
-    """Find a matching merchant mapping for a description. Returns category or None."""
+def _build_merchant_automaton(mappings: List[Tuple[str, List[str], str]]):
+    """
+    Build one Aho-Corasick automaton over every pattern and pattern word.
+    Each key's payload is (key, [(mapping_index, is_full_pattern), ...]).
+    """
+    entries: Dict[str, List[Tuple[int, bool]]] = {}
+    for idx, (pattern, pattern_parts, _) in enumerate(mappings):
+        if pattern:
+            entries.setdefault(pattern, []).append((idx, True))
+        for part in set(pattern_parts):
+            entries.setdefault(part, []).append((idx, False))
+    
+    if not entries:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for key, key_entries in entries.items():
+        automaton.add_word(key, (key, key_entries))
+    automaton.make_automaton()
+    return automaton
+
+def _load_merchant_mappings_snapshot() -> tuple:
+    """
+    Return the current (mappings, automaton, lookup) snapshot, loading it if needed.
+    Patterns are always stored uppercased by the writers, so they are used as-is.
+    """
+    global _MAPPINGS_SNAPSHOT
+    snapshot = _MAPPINGS_SNAPSHOT
+    if snapshot is not None:
+        return snapshot
+    
+    with _MAPPINGS_LOCK:
+        generation = _MAPPINGS_GENERATION
+    
+    # Queried outside the lock so writers holding a pooled connection never wait on it
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
-            # Get all patterns
             cursor.execute("SELECT merchant_pattern, category FROM merchant_mappings")
-            mappings = [dict(row) for row in cursor.fetchall()]
+            mappings = [
+                (row['merchant_pattern'], row['merchant_pattern'].split(), row['category'])
+                for row in cursor.fetchall()
+            ]
+    automaton = _build_merchant_automaton(mappings) if AHOCORASICK_AVAILABLE else None
+    # Statements repeat the same merchants, so results are memoized per snapshot
+    lookup = lru_cache(maxsize=4096)(partial(_match_merchant_category, mappings, automaton))
+    snapshot = (mappings, automaton, lookup)
     
-    desc_upper = description.upper()
+    with _MAPPINGS_LOCK:
+        # A mapping changed while loading: use this snapshot once, but don't publish it
+        if generation == _MAPPINGS_GENERATION:
+            _MAPPINGS_SNAPSHOT = snapshot
+    return snapshot
+
+def _invalidate_merchant_mappings_cache() -> None:
+    """Drop the cached mapping snapshot so the next lookup reloads it."""
+    global _MAPPINGS_SNAPSHOT, _MAPPINGS_GENERATION
+    with _MAPPINGS_LOCK:
+        _MAPPINGS_SNAPSHOT = None
+        _MAPPINGS_GENERATION += 1
+    get_merchant_mappings.clear()
+
+def _match_with_automaton(automaton, mappings: List[Tuple[str, List[str], str]], 
+                          desc_upper: str) -> Optional[str]:
+    """Scan the description once and resolve the winning mapping from the hits."""
+    hit_keys = set()
+    exact_idx = None
+    candidate_idxs = set()
+    for _, (key, key_entries) in automaton.iter(desc_upper):
+        hit_keys.add(key)
+        for idx, is_full_pattern in key_entries:
+            if is_full_pattern:
+                if exact_idx is None or idx < exact_idx:
+                    exact_idx = idx
+            else:
+                candidate_idxs.add(idx)
     
-    # Helper to unpack
-    def unpack(row):
-        return row['merchant_pattern'], row['category']
+    # Exact (substring) matches win over word matches
+    if exact_idx is not None:
+        return mappings[exact_idx][2]
     
-    # Try exact match first
-    for row in mappings:
-        pattern, category = unpack(row)
-        if pattern in desc_upper:
+    for idx in sorted(candidate_idxs):
+        _, pattern_parts, category = mappings[idx]
+        if all(part in hit_keys for part in pattern_parts):
             return category
     
-    # Try fuzzy match (substring match on key parts)
-    for row in mappings:
-        pattern, category = unpack(row)
-        # Split pattern into words and check if all appear in description
-        pattern_parts = pattern.split()
-        if len(pattern_parts) > 0 and all(part in desc_upper for part in pattern_parts):
+    return None
+
+def get_merchant_mapping_for_description(description: str) -> Optional[str]:
+    """Find a matching merchant mapping for a description. Returns category or None."""
+    _, _, lookup = _load_merchant_mappings_snapshot()
+    return lookup(description.upper())
+
+def _match_merchant_category(mappings: List[Tuple[str, List[str], str]], automaton,
+                             desc_upper: str) -> Optional[str]:
+    """Match an uppercased description against one snapshot of the mappings."""
+    if automaton is not None:
+        return _match_with_automaton(automaton, mappings, desc_upper)
+    
+    # Exact (substring) matches win over word matches, so remember the first
+    # word match and keep scanning for an exact one.
+    fuzzy_category = None
+    for pattern, pattern_parts, category in mappings:
+        if pattern in desc_upper:
             return category
+        # Split pattern into words and check if all appear in description
+        if fuzzy_category is None and pattern_parts and all(part in desc_upper for part in pattern_parts):
+            fuzzy_category = category
     
-    return None
+    return fuzzy_category
 
 def delete_merchant_mapping(merchant_pattern: str) -> bool:
     """Delete a merchant mapping."""
@@ -726,6 +1135,9 @@ def delete_merchant_mapping(merchant_pattern: str) -> bool:
             
             deleted = cursor.rowcount > 0
             conn.commit()
+            
+            if deleted:
+                _invalidate_merchant_mappings_cache()
             return deleted
 
 def update_merchant_mapping(old_pattern: str, new_pattern: str, category: str) -> bool:
@@ -740,41 +1152,82 @@ def update_merchant_mapping(old_pattern: str, new_pattern: str, category: str) -
             
             updated = cursor.rowcount > 0
             conn.commit()
+            
+            if updated:
+                _invalidate_merchant_mappings_cache()
             return updated
 
+def _score_cutoff(similarity_threshold: float) -> float:
+    """Convert a 0-1 threshold to a rapidfuzz 0-100 cutoff (0.6 * 100 is 60.000...01)."""
+    return round(similarity_threshold * 100, 6)
+
 def find_similar_transactions(description: str, exclude_id: Optional[int] = None, 
-                             similarity_threshold: float = 0.6) -> List[Dict]:
+                             similarity_threshold: float = 0.6,
+                             top_k: Optional[int] = None) -> List[Dict]:
     """
     Find transactions with similar merchant names using fuzzy matching.
+    If top_k is given, only the top_k best matches are returned, and candidates
+    sharing at least one word with the description (full-text index lookup) are
+    scored first; every transaction is scored if that finds fewer than top_k.
+    Without top_k every transaction is scored, so the result agrees with what
+    bulk_update_category would change.
     """
-    from rapidfuzz import fuzz
+    from rapidfuzz import fuzz, process
     
-    with get_db_connection() as conn:
-        with conn.cursor() as cursor:
-            # Get all transactions
-            cursor.execute("SELECT id, description, category, date, amount FROM transactions")
-            rows = cursor.fetchall()
-            all_transactions = [dict(row) for row in rows]
+    tokens = _FTS_TOKEN_RE.findall(description.lower())
+    query = description.upper()
+    cutoff = _score_cutoff(similarity_threshold)
     
-    similar = []
+    def score_rows(rows):
+        choices = {
+            idx: row[5] for idx, row in enumerate(rows)
+            # Skip the original transaction
+            if not (exclude_id and row[0] == exclude_id)
+        }
+        # Score all candidates in one call; score_cutoff lets rapidfuzz skip
+        # work on obvious non-matches, and results come back sorted by score
+        # (a limit selects the top_k with a partial sort instead of a full one)
+        return process.extract(query, choices, scorer=fuzz.token_set_ratio,
+                               score_cutoff=cutoff, limit=top_k)
     
-    for trans in all_transactions:
-        # Skip the original transaction
-        if exclude_id and trans['id'] == exclude_id:
-            continue
-        
-        # Calculate similarity score
-        score = fuzz.token_set_ratio(description.upper(), trans['description'].upper()) / 100.0
-        
-        # If similar enough, add to results
-        if score >= similarity_threshold:
-            similar.append({
-                **trans,
-                'similarity_score': round(score, 2)
-            })
+    with get_db_connection() as conn:
+        # Plain tuple rows; dicts are only built for the matches below
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            ph = get_placeholder()
+            rows = None
+            if tokens and top_k:
+                # Only score transactions sharing at least one word with the
+                # description, best-ranked first so the LIMIT keeps the likeliest
+                ts_query = ' | '.join(tokens)
+                cursor.execute(f"""
+                    SELECT id, description, category, date, amount, description_norm
+                    FROM transactions
+                    WHERE {_FTS_DOCUMENT} @@ to_tsquery('simple', {ph})
+                    ORDER BY ts_rank({_FTS_DOCUMENT}, to_tsquery('simple', {ph})) DESC
+                    LIMIT {ph}
+                """, (ts_query, ts_query, SIMILAR_CANDIDATE_LIMIT))
+                rows = cursor.fetchall()
+                matches = score_rows(rows)
+                # Typos and joined words share no token with the description, so
+                # score every transaction when the prefilter comes up short
+                if len(matches) < top_k:
+                    rows = None
+            if rows is None:
+                cursor.execute("SELECT id, description, category, date, amount, description_norm FROM transactions")
+                rows = cursor.fetchall()
+                matches = score_rows(rows)
     
-    # Sort by similarity score (descending)
-    similar.sort(key=lambda x: x['similarity_score'], reverse=True)
+    similar = []
+    for _, score, idx in matches:
+        trans_id, trans_desc, category, date, amount, _ = rows[idx]
+        similar.append({
+            'id': trans_id,
+            'description': trans_desc,
+            'category': category,
+            'date': date,
+            'amount': amount,
+            'similarity_score': round(score / 100.0, 2)
+        })
     
     return similar
 
@@ -783,49 +1236,70 @@ def bulk_update_category(description_pattern: str, new_category: str,
     """
     Bulk update transactions with similar descriptions to a new category.
     """
-    from rapidfuzz import fuzz
+    import numpy as np
+    from rapidfuzz import fuzz, process
     
     updated_count = 0
     
     with get_db_connection() as conn:
-        with conn.cursor() as cursor:
-            # Get all transactions
-            cursor.execute("SELECT id, description FROM transactions")
-            # Convert to list of dicts to detach from cursor before starting updates
-            all_transactions = [dict(row) for row in cursor.fetchall()]
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            # Get all transactions as plain (id, uppercased description) tuples;
+            # fetchall detaches them from the cursor before starting updates
+            cursor.execute("SELECT id, description_norm FROM transactions")
+            all_transactions = cursor.fetchall()
             
-            ph = get_placeholder()
+            # Score every description in one call, spread across all CPU cores
+            cutoff = _score_cutoff(similarity_threshold)
+            scores = process.cdist(
+                [description_pattern.upper()],
+                [trans_desc for _, trans_desc in all_transactions],
+                scorer=fuzz.token_set_ratio,
+                score_cutoff=cutoff,
+                workers=-1
+            )
+            matched = np.nonzero(scores[0] >= cutoff)[0]
+            matched_ids = [all_transactions[idx][0] for idx in matched]
             
-            for row in all_transactions:
-                trans_id = row['id']
-                trans_desc = row['description']
-                    
-                score = fuzz.token_set_ratio(description_pattern.upper(), trans_desc.upper()) / 100.0
-                
-                if score >= similarity_threshold:
-                    cursor.execute(
-                        f"UPDATE transactions SET category = {ph} WHERE id = {ph}",
-                        (new_category, trans_id)
-                    )
-                    updated_count += 1
+            if matched_ids:
+                ph = get_placeholder()
+                # One UPDATE for every match instead of one per row
+                cursor.execute(
+                    f"UPDATE transactions SET category = {ph} WHERE id = ANY({ph})",
+                    (new_category, matched_ids)
+                )
+                updated_count = cursor.rowcount
             
             conn.commit()
     
+    if updated_count:
+        st.cache_data.clear()
+    
     return updated_count
 
 def update_merchant_mapping_usage(merchant_pattern: str) -> bool:
     """Update the last_used timestamp for a merchant mapping."""
+    return update_merchant_mapping_usage_bulk([merchant_pattern]) > 0
+
+def update_merchant_mapping_usage_bulk(merchant_patterns: List[str]) -> int:
+    """Update the last_used timestamp for several merchant mappings in one statement."""
+    if not merchant_patterns:
+        return 0
+    
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
             ph = get_placeholder()
             cursor.execute(f"""
                 UPDATE merchant_mappings 
                 SET last_used = CURRENT_TIMESTAMP 
-                WHERE merchant_pattern = {ph}
-            """, (merchant_pattern.upper(),))
+                WHERE merchant_pattern = ANY({ph})
+            """, ([pattern.upper() for pattern in merchant_patterns],))
             
-            updated = cursor.rowcount > 0
+            updated = cursor.rowcount
             conn.commit()
+            
+            if updated:
+                # Mappings are listed by last_used
+                get_merchant_mappings.clear()
             return updated
 
 
@@ -833,10 +1307,15 @@ def get_merchant_mapping_stats() -> Dict[str, any]:
     """Get statistics about merchant mappings and their usage."""
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
-            # Total mappings
-            cursor.execute("SELECT COUNT(*) as count FROM merchant_mappings")
-            row = cursor.fetchone()
-            total_mappings = row['count']
+            # Mappings by category (the total is the sum of the groups)
+            cursor.execute("""
+                SELECT category, COUNT(*) as count
+                FROM merchant_mappings
+                GROUP BY category
+                ORDER BY count DESC
+            """)
+            by_category = {row['category']: row['count'] for row in cursor.fetchall()}
+            total_mappings = sum(by_category.values())
             
             # Most recent mappings
             cursor.execute("""
@@ -846,17 +1325,6 @@ def get_merchant_mapping_stats() -> Dict[str, any]:
                 LIMIT 10
             """)
             recent = [dict(row) for row in cursor.fetchall()]
-            
-            # Mappings by category
-            cursor.execute("""
-                SELECT category, COUNT(*) as count
-                FROM merchant_mappings
-                GROUP BY category
-                ORDER BY count DESC
-            """)
-            rows = cursor.fetchall()
-            
-            by_category = {dict(row)['category']: dict(row)['count'] for row in rows}
     
     return {
         'total_mappings': total_mappings,
@@ -3,13 +3,24 @@ Merchant Learning Module
 Automatically learns and suggests merchant-to-category mappings from historical data.
 """
 
-from typing import List, Dict, Tuple, Optional
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import List, Dict, Set, Tuple, Optional
 from utils.database import (
     get_transactions,
     get_merchant_mappings,
-    add_merchant_mapping
+    add_merchant_mappings_bulk
 )
 
+# Words that never identify a merchant
+_STOP_WORDS = frozenset({
+    'the', 'at', 'from', 'in', 'on', 'a', 'an', 'and', 'or', 'by',
+    'to', 'for', 'with', 'of', 'via', 'through', 'transaction', 'payment'
+})
+
+# Merchant names are built from at most this many leading words
+_MAX_MERCHANT_WORDS = 4
+
 
 def extract_merchant_from_description(description: str) -> str:
     """
@@ -23,22 +34,23 @@ def extract_merchant_from_description(description: str) -> str:
     Returns:
         Extracted merchant name (uppercase)
     """
-    stop_words = {
-        'the', 'at', 'from', 'in', 'on', 'a', 'an', 'and', 'or', 'by',
-        'to', 'for', 'with', 'of', 'via', 'through', 'transaction', 'payment'
-    }
-    
-    words = description.lower().split()
-    merchant_words = [w.strip() for w in words 
-                     if w.strip() not in stop_words and len(w.strip()) > 2]
+    # Single pass that stops once enough merchant words are collected
+    merchant_words = []
+    for word in description.lower().split():
+        if len(word) > 2 and word not in _STOP_WORDS:
+            merchant_words.append(word)
+            if len(merchant_words) == _MAX_MERCHANT_WORDS:
+                break
     
-    # Keep first 3-4 words as merchant name
-    merchant = ' '.join(merchant_words[:4]) if merchant_words else description
+    merchant = ' '.join(merchant_words) if merchant_words else description
     return merchant.upper()
 
 
 def suggest_merchant_mappings(min_frequency: int = 3, 
-                             confidence_threshold: float = 0.8) -> List[Tuple[str, str, int, float]]:
+                             confidence_threshold: float = 0.8,
+                             *,
+                             transactions: Optional[List[Dict]] = None,
+                             mappings: Optional[List[Dict]] = None) -> List[Tuple[str, str, int, float]]:
     """
     Analyze historical transactions and suggest new merchant mappings.
     
@@ -48,33 +60,71 @@ def suggest_merchant_mappings(min_frequency: int = 3,
     Args:
         min_frequency: Minimum number of times a merchant must appear to be suggested
         confidence_threshold: Minimum confidence (0-1) to suggest a mapping
+        transactions: Preloaded get_transactions() result, to skip the read
+        mappings: Preloaded get_merchant_mappings() result, to skip the read
         
     Returns:
         List of (merchant_pattern, suggested_category, frequency, confidence)
         sorted by frequency (descending)
     """
-    transactions = get_transactions()
-    existing_mappings = {m['merchant_pattern']: m['category'] 
-                        for m in get_merchant_mappings()}
+    if transactions is None:
+        transactions = get_transactions()
+    if mappings is None:
+        mappings = get_merchant_mappings()
+    existing_patterns = {m['merchant_pattern'] for m in mappings}
     
-    merchant_categories: Dict[str, Dict[str, int]] = {}
+    merchant_categories, _ = _tally_merchant_categories(transactions, existing_patterns,
+                                                        count_covered=False)
+    return _build_suggestions(merchant_categories, min_frequency, confidence_threshold)
+
+
+def _tally_merchant_categories(transactions: List[Dict],
+                               existing_patterns: Set[str],
+                               count_covered: bool = True) -> Tuple[Dict[str, Counter], int]:
+    """
+    Single pass over transactions shared by suggestions and learning stats.
+    
+    Args:
+        count_covered: Also count uncategorized transactions towards mapping
+            coverage. Without it, uncategorized rows are skipped before
+            merchant extraction since they never produce suggestions.
+    
+    Returns:
+        (category counts per merchant without a mapping,
+         number of transactions whose merchant already has a mapping)
+    """
+    merchant_categories: Dict[str, Counter] = defaultdict(Counter)
+    merchant_by_description: Dict[str, str] = {}
+    covered_by_mapping = 0
     
     # Analyze all transactions
     for trans in transactions:
-        merchant = extract_merchant_from_description(trans['description'])
+        category = trans['category']
+        if category == 'Uncategorized' and not count_covered:
+            continue
+        
+        description = trans['description']
+        # Statements repeat descriptions, so extract each distinct one once
+        merchant = merchant_by_description.get(description)
+        if merchant is None:
+            merchant = extract_merchant_from_description(description)
+            merchant_by_description[description] = merchant
         
         # Skip if already has a mapping
-        if merchant in existing_mappings:
+        if merchant in existing_patterns:
+            covered_by_mapping += 1
             continue
         
-        if merchant not in merchant_categories:
-            merchant_categories[merchant] = {}
-        
-        category = trans['category']
         if category != 'Uncategorized':  # Skip uncategorized
-            merchant_categories[merchant][category] = \
-                merchant_categories[merchant].get(category, 0) + 1
+            merchant_categories[merchant][category] += 1
     
+    return merchant_categories, covered_by_mapping
+
+
+def _build_suggestions(merchant_categories: Dict[str, Counter],
+                       min_frequency: int = 3,
+                       confidence_threshold: float = 0.8) -> List[Tuple[str, str, int, float]]:
+    """Turn per-merchant category counts into suggestions, sorted by frequency."""
     # Generate suggestions with high confidence
     suggestions = []
     for merchant, categories in merchant_categories.items():
@@ -84,33 +134,38 @@ def suggest_merchant_mappings(min_frequency: int = 3,
         total = sum(categories.values())
         if total >= min_frequency:
             # Use most common category
-            best_category, count = max(categories.items(), key=lambda x: x[1])
+            best_category, count = categories.most_common(1)[0]
             confidence = count / total
             
             if confidence >= confidence_threshold:
                 suggestions.append((merchant, best_category, total, confidence))
     
-    # Sort by frequency (descending)
-    return sorted(suggestions, key=lambda x: -x[2])
+    # Sort by frequency (descending); reverse sorting stays stable for ties
+    suggestions.sort(key=itemgetter(2), reverse=True)
+    return suggestions
 
 
 def auto_apply_merchant_mappings(min_frequency: int = 3,
-                                confidence_threshold: float = 0.8) -> Dict[str, int]:
+                                confidence_threshold: float = 0.8,
+                                *,
+                                suggestions: Optional[List[Tuple[str, str, int, float]]] = None) -> Dict[str, int]:
     """
     Automatically apply learned merchant mappings to the database.
     
     Args:
         min_frequency: Minimum frequency threshold
         confidence_threshold: Minimum confidence threshold
+        suggestions: Already computed suggest_merchant_mappings() result, to skip recomputing it
         
     Returns:
         Dictionary with statistics: {
             'added': count of new mappings added,
-            'skipped': count of suggestions skipped,
-            'failed': count of add operations that failed
+            'skipped': count of suggestions skipped (pattern already mapped),
+            'failed': count of suggestions not added because the insert failed
         }
     """
-    suggestions = suggest_merchant_mappings(min_frequency, confidence_threshold)
+    if suggestions is None:
+        suggestions = suggest_merchant_mappings(min_frequency, confidence_threshold)
     
     stats = {
         'added': 0,
@@ -118,41 +173,49 @@ def auto_apply_merchant_mappings(min_frequency: int = 3,
         'failed': 0
     }
     
-    for merchant, category, frequency, confidence in suggestions:
-        try:
-            if add_merchant_mapping(merchant, category):
-                stats['added'] += 1
-            else:
-                stats['failed'] += 1
-        except Exception as e:
-            print(f"Error adding mapping for {merchant}: {e}")
-            stats['failed'] += 1
+    if not suggestions:
+        return stats
+    
+    # Insert every suggestion in one statement and transaction
+    try:
+        stats['added'] = add_merchant_mappings_bulk(
+            [(merchant, category) for merchant, category, _, _ in suggestions]
+        )
+        stats['skipped'] = len(suggestions) - stats['added']
+    except Exception as e:
+        print(f"Error adding merchant mappings: {e}")
+        stats['failed'] = len(suggestions)
     
     return stats
 
 
-def get_learning_stats() -> Dict:
+def get_learning_stats(*,
+                       transactions: Optional[List[Dict]] = None,
+                       mappings: Optional[List[Dict]] = None) -> Dict:
     """
     Get statistics about merchant learning progress.
     
+    Args:
+        transactions: Preloaded get_transactions() result, to skip the read
+        mappings: Preloaded get_merchant_mappings() result, to skip the read
+    
     Returns:
         Dictionary containing various learning metrics
     """
-    transactions = get_transactions()
-    mappings = get_merchant_mappings()
+    if transactions is None:
+        transactions = get_transactions()
+    if mappings is None:
+        mappings = get_merchant_mappings()
     
     total_transactions = len(transactions)
     uncategorized = sum(1 for t in transactions if t['category'] == 'Uncategorized')
     categorized = total_transactions - uncategorized
     
-    # Count transactions covered by merchant mappings
-    covered_by_mapping = 0
-    for trans in transactions:
-        merchant = extract_merchant_from_description(trans['description'])
-        if any(m['merchant_pattern'] == merchant for m in mappings):
-            covered_by_mapping += 1
-    
-    suggestions = suggest_merchant_mappings()
+    # One pass yields both mapping coverage and the pending suggestions,
+    # instead of re-reading and re-scanning everything via suggest_merchant_mappings
+    existing_patterns = {m['merchant_pattern'] for m in mappings}
+    merchant_categories, covered_by_mapping = _tally_merchant_categories(transactions, existing_patterns)
+    suggestions = _build_suggestions(merchant_categories)
     
     return {
         'total_transactions': total_transactions,
@@ -188,6 +251,8 @@ def suggest_and_apply_mappings_auto(min_frequency: int = 3,
     }
     
     if auto_apply and suggestions:
-        result['applied'] = auto_apply_merchant_mappings(min_frequency, confidence_threshold)
+        result['applied'] = auto_apply_merchant_mappings(
+            min_frequency, confidence_threshold, suggestions=suggestions
+        )
     
     return result
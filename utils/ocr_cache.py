@@ -0,0 +1,69 @@
+"""
+OCR Cache Module
+Keeps recent OCR text in memory, keyed by a hash of the rasterized page, so
+re-parsing the same statement within a session skips Tesseract. Nothing is
+written to disk, and entries are bounded in number and age.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+# Pages kept, and how long (seconds) an entry stays valid
+MAX_ENTRIES = 256
+TTL_SECONDS = 3600
+
+# key -> (stored_at, text), least recently used first
+_entries: 'OrderedDict[str, tuple]' = OrderedDict()
+# Streamlit sessions run on separate threads of the same process
+_lock = threading.Lock()
+
+
+def page_key(image_path: str, variant: str) -> str:
+    """
+    Hash a rasterized page file together with the OCR settings that produced its text.
+
+    Args:
+        image_path: Path to the page image written by pdf2image
+        variant: OCR engine/preprocessing/language tag; changing it invalidates old entries
+    """
+    digest = hashlib.sha256(variant.encode())
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cached_texts(keys: List[str]) -> Dict[str, str]:
+    """Return cached OCR text for whichever of the page keys are present and fresh."""
+    found = {}
+    now = time.monotonic()
+    with _lock:
+        for key in keys:
+            entry = _entries.get(key)
+            if entry is None:
+                continue
+            stored_at, text = entry
+            if now - stored_at > TTL_SECONDS:
+                del _entries[key]
+                continue
+            _entries.move_to_end(key)
+            found[key] = text
+    return found
+
+
+def set_cached_text(key: str, text: str):
+    """Store OCR text for a page key, evicting the least recently used entries."""
+    with _lock:
+        _entries[key] = (time.monotonic(), text)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def clear():
+    """Drop every cached page."""
+    with _lock:
+        _entries.clear()
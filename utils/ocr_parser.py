@@ -1,8 +1,72 @@
 import pytesseract
 from PIL import Image
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
+from functools import lru_cache, partial
+
+# Patterns are compiled once at import instead of per line
+# Trailing amount, optionally prefixed with PHP; the lookbehind keeps the whole
+# run of digits/commas, as a plain search for the amount would
+_AMOUNT_PART = r'(?:PHP\s*)?(?<![-\d,])(?P<amount>[-\d,]+\.\d{2})\s*$'
+# BPI: Month Name (3+ chars) + Day (1-2 digits), case-insensitive
+_BPI_DATE_PART = r'(?i:(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2})'
+# UnionBank: MM/DD/YY
+_UB_DATE_PART = r'\d{2}/\d{2}/\d{2}'
+
+def _line_pattern(date_part: str) -> re.Pattern:
+    """
+    One pattern per bank matching a whole transaction line in a single scan:
+    transaction date, optional posting date, the text after them, trailing amount.
+    """
+    return re.compile(
+        rf'(?P<date>{date_part})(?:\s*{date_part})?\s*(?P<description>.*?)\s*{_AMOUNT_PART}'
+    )
+
+_BPI_LINE_RE = _line_pattern(_BPI_DATE_PART)
+_UB_LINE_RE = _line_pattern(_UB_DATE_PART)
+_BPI_DATE_RE = re.compile(_BPI_DATE_PART)
+_UB_DATE_RE = re.compile(_UB_DATE_PART)
+# Deletes thousands separators from amounts in one C-level pass
+_COMMA_TABLE = str.maketrans('', '', ',')
+
+# Statements repeat the same few dates, and strptime is slow, so parses are cached
+@lru_cache(maxsize=1024)
+def _parse_month_day(date_str: str) -> Optional[Tuple[int, int]]:
+    """Parse a BPI 'Dec 1' / 'December 1' date into (month, day), or None."""
+    date_str_clean = date_str.replace('.', '')
+    for fmt in ('%b %d', '%B %d'):
+        try:
+            dt = datetime.strptime(date_str_clean, fmt)
+            return dt.month, dt.day
+        except ValueError:
+            continue
+    return None
+
+@lru_cache(maxsize=1024)
+def _parse_ub_date(date_str: str) -> Optional[str]:
+    """Parse a UnionBank MM/DD/YY date into YYYY-MM-DD, or None."""
+    try:
+        # 2-digit year is handled by strptime (mapping 00-68 to 2000-2068, 69-99 to 1969-1999)
+        return datetime.strptime(date_str, '%m/%d/%y').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+def _after_last_date(description: str, date_re: re.Pattern) -> str:
+    """
+    The description starts after the last date on the line, which is what
+    mappings and learned categories are keyed on. Lines rarely have a third
+    date, so the common case costs one failed search of the short description.
+    """
+    last_date = date_re.search(description)
+    if last_date is None:
+        return description
+    for last_date in date_re.finditer(description, last_date.end()):
+        pass
+    return description[last_date.end():].strip()
 
 def extract_text_from_image(image_file) -> str:
     """
@@ -11,10 +75,18 @@ def extract_text_from_image(image_file) -> str:
     row-by-row transaction lists.
     """
     try:
-        image = Image.open(image_file)
-        # --psm 6: Assume a single uniform block of text.
-        text = pytesseract.image_to_string(image, config='--psm 6')
-        return text
+        with Image.open(image_file) as image:
+            # Hand Tesseract a single-channel image so it skips its own colour
+            # conversion; binarization is left to Tesseract's Otsu pass, which
+            # copes with dark-mode screenshots better than a fixed threshold
+            gray = image.convert('L')
+        
+        try:
+            # --psm 6: Assume a single uniform block of text.
+            # --oem 1: LSTM engine only, no legacy engine fallback.
+            return pytesseract.image_to_string(gray, config='--psm 6 --oem 1')
+        finally:
+            gray.close()
     except Exception as e:
         print(f"Error during OCR: {e}")
         return ""
@@ -26,73 +98,43 @@ def parse_bpi_transactions(text: str) -> List[Dict]:
     or "Dec 1 Description 50.00" (Single Date)
     """
     transactions = []
-    lines = text.split('\n')
-    current_year = datetime.now().year
-    
-    amount_re = r'(?:PHP\s*)?([-\d,]+\.\d{2})'
-    # Month Name (3+ chars) + Day (1-2 digits)
-    date_part_re = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}'
+    now = datetime.now()
+    current_year = now.year
 
-    for line in lines:
+    for line in text.splitlines():
         clean_line = line.strip()
-        if not clean_line:
+        # Every transaction line ends with a two-decimal amount, so headers,
+        # totals labels and OCR noise are dropped without running the regex
+        if not clean_line or not clean_line[-1].isdigit():
             continue
-            
-        # 1. Check for amount at end
-        amount_match = re.search(amount_re + r'\s*$', clean_line)
-        if not amount_match:
+        
+        # Date(s), description and trailing amount in one scan
+        match = _BPI_LINE_RE.search(clean_line)
+        if not match:
             continue
-            
-        amount_str = amount_match.group(1)
-        remaining_text = clean_line[:amount_match.start()].strip()
         
         try:
-            amount = float(amount_str.replace(',', ''))
+            amount = float(match.group('amount').translate(_COMMA_TABLE))
         except ValueError:
             continue
-            
-        # 2. Check for dates at the beginning
-        date_matches = list(re.finditer(date_part_re, remaining_text, re.IGNORECASE))
         
-        if not date_matches:
+        # The first date is the transaction date; description follows the dates
+        date_str = match.group('date')
+        description = _after_last_date(match.group('description'), _BPI_DATE_RE)
+        
+        month_day = _parse_month_day(date_str)
+        if not month_day:
             continue
-            
-        # Take the first date found as the transaction date
-        first_date_match = date_matches[0]
-        date_str = first_date_match.group(0)
         
-        # Description is after the last date
-        last_date_match = date_matches[-1]
-        description = remaining_text[last_date_match.end():].strip()
+        month, day = month_day
+        # Year rollover logic: if current is Jan and trans is Dec, use prev year
+        year = now.year - 1 if now.month == 1 and month == 12 else current_year
         
-        try:
-            # Parse text date
-            date_str_clean = date_str.replace('.', '')
-            parsed_date = None
-            
-            for fmt in ['%b %d', '%B %d']:
-                try:
-                    dt = datetime.strptime(date_str_clean, fmt)
-                    parsed_date = dt.replace(year=current_year)
-                    break
-                except ValueError:
-                    continue
-            
-            if parsed_date:
-                # Year rollover logic: if current is Jan and trans is Dec, use prev year
-                now = datetime.now()
-                if now.month == 1 and parsed_date.month == 12:
-                    parsed_date = parsed_date.replace(year=now.year - 1)
-                
-                formatted_date = parsed_date.strftime('%Y-%m-%d')
-                
-                transactions.append({
-                    'date': formatted_date,
-                    'description': description,
-                    'amount': amount
-                })
-        except Exception:
-            continue
+        transactions.append({
+            'date': f"{year:04d}-{month:02d}-{day:02d}",
+            'description': description,
+            'amount': amount
+        })
             
     return transactions
 
@@ -102,57 +144,46 @@ def parse_ub_transactions(text: str) -> List[Dict]:
     Format: "01/19/26 01/20/26 Description 1,234.56" (Double Date MM/DD/YY)
     """
     transactions = []
-    lines = text.split('\n')
-    
-    amount_re = r'(?:PHP\s*)?([-\d,]+\.\d{2})'
-    # MM/DD/YY
-    date_part_re = r'\d{2}/\d{2}/\d{2}'
 
-    for line in lines:
+    for line in text.splitlines():
         clean_line = line.strip()
-        if not clean_line:
+        # Every transaction line ends with a two-decimal amount, so headers,
+        # totals labels and OCR noise are dropped without running the regex
+        if not clean_line or not clean_line[-1].isdigit():
             continue
-            
-        # 1. Check for amount at end
-        amount_match = re.search(amount_re + r'\s*$', clean_line)
-        if not amount_match:
+        
+        # Date(s), description and trailing amount in one scan
+        match = _UB_LINE_RE.search(clean_line)
+        if not match:
             continue
-            
-        amount_str = amount_match.group(1)
-        remaining_text = clean_line[:amount_match.start()].strip()
         
         try:
-            amount = float(amount_str.replace(',', ''))
+            amount = float(match.group('amount').translate(_COMMA_TABLE))
         except ValueError:
             continue
-            
-        # 2. Check for dates at the beginning
-        date_matches = list(re.finditer(date_part_re, remaining_text))
-        
-        if not date_matches:
-            continue
-            
-        first_date_match = date_matches[0]
-        date_str = first_date_match.group(0)
         
-        last_date_match = date_matches[-1]
-        description = remaining_text[last_date_match.end():].strip()
+        date_str = match.group('date')
+        description = _after_last_date(match.group('description'), _UB_DATE_RE)
         
-        try:
-            parsed_date = datetime.strptime(date_str, '%m/%d/%y')
-            # 2-digit year is handled by strptime (mapping 00-68 to 2000-2068, 69-99 to 1969-1999)
-            formatted_date = parsed_date.strftime('%Y-%m-%d')
-            
-            transactions.append({
-                'date': formatted_date,
-                'description': description,
-                'amount': amount
-            })
-        except Exception:
+        formatted_date = _parse_ub_date(date_str)
+        if not formatted_date:
             continue
+        
+        transactions.append({
+            'date': formatted_date,
+            'description': description,
+            'amount': amount
+        })
             
     return transactions
 
+# Parser per normalized bank name (lowercase, no spaces)
+_PARSERS = {
+    'unionbank': parse_ub_transactions,
+    'ub': parse_ub_transactions,
+    'bpi': parse_bpi_transactions,
+}
+
 def extract_transactions_from_image(image_file: str, bank_name: str = "") -> Tuple[bool, List[Dict], Optional[str]]:
     """
     Main entry point for image-based transaction extraction.
@@ -165,24 +196,16 @@ def extract_transactions_from_image(image_file: str, bank_name: str = "") -> Tup
         if not text:
             return False, [], "No text could be extracted from the image."
             
-        transactions = []
-        
-        # Normalize bank name for checking
+        # Normalize bank name for lookup
         bank_norm = bank_name.lower().replace(" ", "")
         
-        if "unionbank" in bank_norm or "ub" in bank_norm:
-            transactions = parse_ub_transactions(text)
-        elif "bpi" in bank_norm:
-            transactions = parse_bpi_transactions(text)
-        else:
-            # Fallback: Try both or use a generic approach?
-            # Let's try matching patterns:
-            # If text has slashes in dates, try UB
-            if re.search(r'\d{2}/\d{2}/\d{2}', text):
-                transactions = parse_ub_transactions(text)
-            else:
-                # Default to BPI style (Month Name)
-                transactions = parse_bpi_transactions(text)
+        parser = _PARSERS.get(bank_norm)
+        if parser is None:
+            # Unknown bank: if text has slashes in dates, try UB,
+            # otherwise default to BPI style (Month Name)
+            parser = parse_ub_transactions if _UB_DATE_RE.search(text) else parse_bpi_transactions
+        
+        transactions = parser(text)
         
         if not transactions:
             return False, [], f"Text extracted but no transactions found matching extraction logic for {bank_name or 'unknown bank'}."
@@ -191,3 +214,24 @@ def extract_transactions_from_image(image_file: str, bank_name: str = "") -> Tup
         
     except Exception as e:
         return False, [], f"Error processing image: {str(e)}"
+
+def extract_transactions_from_images(image_files: List[str], bank_name: str = "") -> List[Tuple[bool, List[Dict], Optional[str]]]:
+    """
+    Run extract_transactions_from_image over several images in parallel.
+    Tesseract is CPU-bound per image, so each image gets its own (spawned) process.
+    Args:
+        image_files: Paths to images (not open file handles, which can't be sent to workers)
+        bank_name: Name of the bank (e.g. "BPI", "UnionBank")
+    Returns:
+        One (success, transactions, error) result per image, in input order
+    """
+    extract = partial(extract_transactions_from_image, bank_name=bank_name)
+    
+    if len(image_files) <= 1:
+        return [extract(image_file) for image_file in image_files]
+    
+    workers = min(len(image_files), os.cpu_count() or 1)
+    # Spawned, not forked: a fork of the threaded Streamlit server can copy a
+    # lock held by another thread and deadlock the worker
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as executor:
+        return list(executor.map(extract, image_files, chunksize=1))
@@ -1,10 +1,20 @@
 import pdfplumber
 import pikepdf
+from pdfminer.pdfdocument import PDFEncryptionError, PDFPasswordIncorrect
 import re
-from typing import List, Dict, Optional, Tuple
+import string
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from itertools import islice
+from multiprocessing import get_context
+from typing import Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
 import tempfile
 import os
+import shutil
+import threading
+from utils import ocr_cache
 
 # OCR imports (optional, will gracefully degrade if not available)
 try:
@@ -15,6 +25,195 @@ try:
 except ImportError:
     OCR_AVAILABLE = False
 
+# tesserocr (optional) keeps Tesseract loaded in-process instead of spawning the CLI per page
+try:
+    from tesserocr import PyTessBaseAPI
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# OpenCV (optional) binarizes pages before OCR
+try:
+    import cv2
+    import numpy as np
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+# Binarized text at 200 DPI reads as well as 300 DPI grayscale with fewer pixels
+OCR_DPI = 200 if CV2_AVAILABLE else 300
+# Tags cached OCR text with the settings that produced it
+OCR_CACHE_VARIANT = (f"{'tesserocr' if TESSEROCR_AVAILABLE else 'pytesseract'}-"
+                     f"{'otsu' if CV2_AVAILABLE else 'gray'}-eng")
+# pdftoppm threads for rasterization, leaving a core for the app
+OCR_RASTER_THREADS = max(1, (os.cpu_count() or 2) - 1)
+# Tesseract processes; each also threads internally, so use half the cores
+OCR_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# OCR workers are spawned: forking the threaded Streamlit server can copy a
+# lock another thread holds and deadlock the child
+_OCR_MP_CONTEXT = get_context('spawn')
+# Pages per Tesseract run while looking for the stop marker; small enough that
+# little is OCR'd for nothing (the marker is normally on page 1, read last anyway)
+OCR_BATCH_PAGES = 3
+
+_MONTH_NUM = {
+    'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4, 'MAY': 5, 'JUNE': 6,
+    'JULY': 7, 'AUGUST': 8, 'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12
+}
+_MONTH_NAMES = 'January|February|March|April|May|June|July|August|September|October|November|December'
+# Full or abbreviated month name -> month number, keyed by the first three letters
+_MONTH_NUM_BY_ABBR = {name[:3]: num for name, num in _MONTH_NUM.items()}
+
+# Compiled once instead of on every parse call / line
+_YEAR_RE = re.compile(r'\b20\d{2}\b')
+_STATEMENT_DATE_LINE_RE = re.compile(r'^.*STATEMENT DATE.*$', re.IGNORECASE | re.MULTILINE)
+_MONTH_RE = re.compile(
+    r'\b(JAN(?:UARY)?|FEB(?:RUARY)?|MAR(?:CH)?|APR(?:IL)?|MAY|JUNE?|JULY?|AUG(?:UST)?'
+    r'|SEP(?:TEMBER)?|OCT(?:OBER)?|NOV(?:EMBER)?|DEC(?:EMBER)?)\b',
+    re.IGNORECASE
+)
+_HAS_MONTH_DAY_RE = re.compile(rf'({_MONTH_NAMES})\s+\d{{1,2}}')
+_MONTH_DAY_RE = re.compile(rf'^({_MONTH_NAMES})\s+(\d{{1,2}})', re.IGNORECASE)
+
+# UnionBank statements often include a transaction table, but PDFs can contain other
+# sections with similar date-like patterns. To avoid false positives, we parse
+# line-by-line and require the *entire* line to match a strict structure.
+#
+# Expected format (common):
+#   11/02/25 11/04/25 SHOPEE PH, MANDALUYONG PHP 220.00
+# Amount may be negative, may have commas, and may omit the PHP token.
+_UB_LINE_RE = re.compile(
+    r'^\s*'
+    r'(?P<trx_date>\d{2}/\d{2}/\d{2})\s+'
+    r'(?P<post_date>\d{2}/\d{2}/\d{2})\s+'
+    r'(?P<desc>.+?)\s+'
+    r'(?:(?P<ccy>PHP)\s+)?'
+    r'(?P<amt>-?[\d,]+\.\d{2})'
+    r'\s*$'
+)
+
+def _is_amount_only(line: str) -> bool:
+    """
+    Whether a stripped line is only an amount such as 1,234.56 (digits and
+    commas, a dot, two digits), checked with str methods instead of a regex.
+    """
+    return (len(line) >= 4 and line[-3] == '.' and line[-2:].isdecimal()
+            and line[:-3].replace(',', '0').isdecimal())
+
+def _page_marker_lines(text: str) -> List[int]:
+    """
+    Indexes of the lines containing '=== PAGE', found with str.find and
+    newline counting instead of testing every line.
+    """
+    page_starts = []
+    line_no = 0
+    line_start = 0
+    marker = text.find('=== PAGE')
+    while marker != -1:
+        line_no += text.count('\n', line_start, marker)
+        page_starts.append(line_no)
+        # Resume after this line so a line is reported once
+        line_start = text.find('\n', marker)
+        if line_start == -1:
+            break
+        marker = text.find('=== PAGE', line_start)
+    return page_starts
+
+def _keyword_re(keywords: List[str], flags: int = 0) -> re.Pattern:
+    """Fuse a keyword list into one alternation so a line is scanned once."""
+    return re.compile('|'.join(map(re.escape, keywords)), flags)
+
+# BPI: end of the transaction table
+_BPI_STOP_RE = _keyword_re([
+    'Installment Balance Summary', 'Payment Instructions',
+    'Contact Us', 'KEEP US UPDATED', 'Bank of the Philippine Islands'
+])
+# BPI: summary lines and headers inside the table
+_BPI_SKIP_RE = _keyword_re([
+    'Payment -', 'Finance Charge', 'Previous Balance',
+    'Past Due', 'Ending Balance', 'Unbilled',
+    'Total', 'Transaction', 'Post Date',
+    'Purchase Amount', 'Remaining', 'Date', 'Last Payment'
+])
+# BPI: non-merchant lines on split-column continuation pages
+_BPI_PAGE_SKIP_RE = _keyword_re([
+    'BPI Credit Cards', 'Customer Number', 'Transaction', 'Post Date',
+    'BPI REWARDS', 'Statement of Account'
+])
+
+_UB_SKIP_RE = _keyword_re([
+    'BALANCE', 'SUBTOTAL', 'TOTAL', 'AMOUNT DUE',
+    'CREDIT LIMIT', 'AVAILABLE', 'POINTS', 'STATEMENT DATE',
+    'FINANCE CHARGE', 'REWARDS VISA PLATINUM', 'CARD NO',
+    'MINIMUM AMOUNT DUE', 'PREVIOUS BALANCE', 'ENDING BALANCE'
+], re.IGNORECASE)
+# Statement headers (matched at the start of the description)
+_UB_HEADER_RE = _keyword_re(['STATEMENT', 'PAGE', 'TRANSACTION'], re.IGNORECASE)
+
+# Headers, summaries and example tables
+_GENERIC_SKIP_RE = _keyword_re([
+    'PAYMENT', 'BALANCE', 'SUBTOTAL', 'TOTAL', 'AMOUNT DUE',
+    'CREDIT LIMIT', 'AVAILABLE', 'POINTS', 'STATEMENT DATE',
+    'FINANCE CHARGE', 'DATE POST', 'DESCRIPTION AMOUNT',
+    'MINIMUM AMOUNT DUE', 'PREVIOUS BALANCE', 'ENDING BALANCE',
+    'POST DATE TRANSACTION', 'CARD NO', 'INTEREST RATE',
+    'STATEMENT SUMMARY', 'OVERLIMIT', 'DEBITS CREDITS'
+], re.IGNORECASE)
+
+# Common generic layouts in one pass; the named date group tells them apart
+_GENERIC_TRANSACTION_RE = re.compile(
+    r'(?:(?P<mdy>\d{2}/\d{2}/\d{4})'   # MM/DD/YYYY
+    r'|(?P<ymd>\d{4}-\d{2}-\d{2})'     # YYYY-MM-DD
+    r'|(?P<md>\d{2}/\d{2}))'            # MM/DD
+    r'\s+(?P<description>[A-Z0-9\s\-\.\,\&\/]+?)\s+(?P<amount>[\d,]+\.\d{2})'
+)
+
+# Bank detection for extract_transactions(bank_type="auto")
+_UNIONBANK_RE = re.compile('UNIONBANK|UNION BANK', re.IGNORECASE)
+_BPI_RE = re.compile('BPI|BANK OF THE PHILIPPINE ISLANDS', re.IGNORECASE)
+
+# Deletes ASCII letters and digits, so the remaining length counts everything else
+_DROP_ALNUM_TABLE = str.maketrans('', '', string.ascii_letters + string.digits)
+
+def _alnum_ratio(text: str) -> float:
+    """Share of alphanumeric characters, counted in C for plain-ASCII text."""
+    if text.isascii():
+        alnum = len(text) - len(text.translate(_DROP_ALNUM_TABLE))
+    else:
+        alnum = sum(map(str.isalnum, text))
+    return alnum / max(len(text), 1)
+
+def _is_garbled(text: Optional[str]) -> bool:
+    """
+    Check if text is garbled or empty.
+    Garbled text often contains (cid:XXX) patterns or has very low alphanumeric ratio.
+    """
+    return (
+        not text or not text.strip() or
+        '(cid:' in text or  # Common in garbled PDFs
+        _alnum_ratio(text) < 0.3  # Less than 30% alphanumeric
+    )
+
+def _may_be_encrypted(pdf_path: str, window: int = 4096) -> bool:
+    """
+    Look for /Encrypt in the first and last few KB of the file, where the trailer
+    (or linearized first-page trailer) lives, instead of parsing the whole xref.
+    """
+    with open(pdf_path, 'rb') as f:
+        head = f.read(window)
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - window, 0))
+        tail = f.read(window)
+    return b'/Encrypt' in head or b'/Encrypt' in tail
+
+def _is_password_error(error: Exception) -> bool:
+    """
+    True for pdfminer's missing/wrong password errors, raised bare or wrapped
+    in pdfplumber's PdfminerException (pdfplumber >= 0.11).
+    """
+    return any(isinstance(e, (PDFPasswordIncorrect, PDFEncryptionError))
+               for e in (error, *error.args))
+
 def unlock_pdf(pdf_path: str, password: str) -> Tuple[bool, Optional[str], Optional[str]]:
     """
     Unlock a password-protected PDF.
@@ -38,19 +237,32 @@ def unlock_pdf(pdf_path: str, password: str) -> Tuple[bool, Optional[str], Optio
     except Exception as e:
         return False, None, f"Error unlocking PDF: {str(e)}"
 
-def extract_text_from_pdf(pdf_path: str, password: Optional[str] = None) -> Tuple[bool, Optional[str], Optional[str]]:
+def extract_text_from_pdf(pdf_path: str, password: Optional[str] = None,
+                          max_pages_from_end: Optional[int] = None) -> Tuple[bool, Optional[str], Optional[str]]:
     """
     Extract text from PDF (with optional password).
     Reads pages in reverse order since transactions are typically on last pages.
     
+    Args:
+        pdf_path: Path to PDF file
+        password: Optional password for protected PDFs
+        max_pages_from_end: Only extract this many trailing pages plus the first
+            page (statement header); None (default) reads every page. Transactions
+            on skipped middle pages are lost, so a warning is returned when any are
+    
     Returns:
-        Tuple of (success, extracted_text, error_message)
+        Tuple of (success, extracted_text, error_message); on success the
+        message is a warning about skipped pages, or None
     """
     unlocked_path = None
+    image_dir = None
+    raster_future = None
     
     try:
-        # If no password provided, quickly detect encrypted PDFs
-        if not password:
+        # If no password provided, quickly detect encrypted PDFs.
+        # Only files that declare /Encrypt are opened with pikepdf, since many
+        # statements are encrypted with an empty user password and open fine
+        if not password and _may_be_encrypted(pdf_path):
             try:
                 with pikepdf.open(pdf_path):
                     pass
@@ -68,44 +280,249 @@ def extract_text_from_pdf(pdf_path: str, password: Optional[str] = None) -> Tupl
         
         # Extract text using pdfplumber
         # Read pages in REVERSE order (last pages first) since transactions are usually at the end
-        text = ""
+        parts = []
+        skipped_pages = 0
+        garbled_pages = 0
         with pdfplumber.open(pdf_to_read) as pdf:
+            pages = pdf.pages
+            # Optionally skip the layout parsing of middle pages on long statements
+            if max_pages_from_end and len(pages) > max_pages_from_end + 1:
+                skipped_pages = len(pages) - max_pages_from_end - 1
+                pages = pages[:1] + pages[-max_pages_from_end:]
+            
             # Reverse the page order
-            for page in reversed(pdf.pages):
+            for page_index, page in enumerate(reversed(pages)):
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
-        
-        # Clean up temporary file if created
-        if unlocked_path and os.path.exists(unlocked_path):
-            os.remove(unlocked_path)
-        
-        # Check if text is garbled or empty
-        # Garbled text often contains (cid:XXX) patterns or has very low alphanumeric ratio
-        is_garbled = (
-            not text.strip() or 
-            '(cid:' in text or  # Common in garbled PDFs
-            len([c for c in text if c.isalnum()]) / max(len(text), 1) < 0.3  # Less than 30% alphanumeric
-        )
+                    parts.append(page_text)
+                    parts.append("\n")
+                # Release the page's parsed layout objects before moving on
+                page.flush_cache()
+                
+                # Garbled last two pages (read first here) usually mean a scanned
+                # statement, so start rasterizing for OCR while pdfplumber reads
+                # the rest; a single garbled page is often just a cover or logo
+                if page_index < 2 and OCR_AVAILABLE and _is_garbled(page_text):
+                    garbled_pages += 1
+                    if garbled_pages == 2:
+                        image_dir = tempfile.mkdtemp()
+                        raster_future = _rasterize_in_background(pdf_to_read, image_dir)
+        text = "".join(parts)
         
-        if is_garbled:
+        if _is_garbled(text):
             # Try OCR as fallback
             if OCR_AVAILABLE:
-                return extract_text_with_ocr(pdf_path, password)
+                return extract_text_with_ocr(pdf_path, password, rasterized=raster_future)
             else:
                 return False, None, "No readable text found in PDF. This appears to be an image-based PDF. Please install OCR dependencies (pytesseract, pdf2image)."
         
-        return True, text, None
+        warning = None
+        if skipped_pages:
+            warning = (f"Skipped {skipped_pages} middle pages (read the first page and "
+                       f"the last {max_pages_from_end}); transactions on them were not parsed.")
+        return True, text, warning
         
     except Exception as e:
-        # Clean up temporary file if created
-        if unlocked_path and os.path.exists(unlocked_path):
-            os.remove(unlocked_path)
-        
+        # The /Encrypt probe can miss a trailer outside its window
+        if _is_password_error(e):
+            return False, None, "PDF is password-protected. Please enter the password."
         return False, None, f"Error reading PDF: {str(e)}"
+    
+    finally:
+        # Clean up temporary files; a speculative rasterization may still be
+        # reading the unlocked PDF, so in that case wait for it in the background
+        if raster_future is None:
+            _remove_temp_files(unlocked_path, image_dir)
+        else:
+            raster_future.add_done_callback(
+                lambda _: _remove_temp_files(unlocked_path, image_dir))
+
+def _remove_temp_files(unlocked_path: Optional[str], image_dir: Optional[str]):
+    if unlocked_path and os.path.exists(unlocked_path):
+        os.remove(unlocked_path)
+    if image_dir:
+        shutil.rmtree(image_dir, ignore_errors=True)
+
+def _rasterize_pdf(pdf_path: str, image_dir: str) -> List[str]:
+    """
+    Convert PDF to images (all pages at once for efficiency).
+    pdftoppm renders grayscale pages on several threads and writes them
+    to disk, so only file paths are handed to the OCR workers.
+    """
+    return convert_from_path(pdf_path, dpi=OCR_DPI,
+                             thread_count=OCR_RASTER_THREADS,
+                             output_folder=image_dir,
+                             grayscale=True,
+                             paths_only=True)
+
+def _rasterize_in_background(pdf_path: str, image_dir: str) -> Future:
+    """Start _rasterize_pdf on a background thread; the future yields the page image paths."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(_rasterize_pdf, pdf_path, image_dir)
+    # Don't wait on exit; the submitted rasterization still runs to completion
+    executor.shutdown(wait=False)
+    return future
+
+# One tesserocr session per thread, reused for every page it OCRs.
+# PyTessBaseAPI is not thread-safe and inline OCR runs on Streamlit session threads
+_tess_local = threading.local()
+
+def _get_tess_api():
+    api = getattr(_tess_local, 'api', None)
+    if api is None:
+        api = _tess_local.api = PyTessBaseAPI(lang='eng')
+    return api
+
+def _preprocess_for_ocr(image: 'Image.Image') -> 'Image.Image':
+    """Otsu-binarize a grayscale page so Tesseract can skip its own thresholding."""
+    if not CV2_AVAILABLE:
+        return image
+    _, binary = cv2.threshold(np.asarray(image), 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return Image.fromarray(binary)
+
+def _ocr_page(image_path: str) -> str:
+    """OCR one rasterized page. Module-level so worker processes can run it."""
+    # Both the page and its binarized copy are released as soon as the text is read
+    with Image.open(image_path) as page_image, _preprocess_for_ocr(page_image) as image:
+        if TESSEROCR_AVAILABLE:
+            api = _get_tess_api()
+            api.SetImage(image)
+            page_text = api.GetUTF8Text()
+            # The session outlives the page; drop its copy of the image and results
+            api.Clear()
+            return page_text
+        return pytesseract.image_to_string(image, lang='eng')
+
+def _ocr_page_batch(image_paths: List[str]) -> List[str]:
+    """
+    OCR several pages in one Tesseract run through an image list file, paying
+    process start-up and model load once. Returns one text per page, in order.
+    tesserocr already keeps its model loaded, so it simply loops.
+    """
+    if TESSEROCR_AVAILABLE or len(image_paths) == 1:
+        return [_ocr_page(image_path) for image_path in image_paths]
+    
+    batch_paths = image_paths
+    if CV2_AVAILABLE:
+        # The CLI reads the files itself, so binarized copies go next to the originals
+        batch_paths = []
+        for image_path in image_paths:
+            with Image.open(image_path) as page_image, _preprocess_for_ocr(page_image) as image:
+                image.save(image_path + '.otsu.pgm')
+            batch_paths.append(image_path + '.otsu.pgm')
+    
+    list_path = image_paths[0] + '.batch.txt'
+    with open(list_path, 'w') as f:
+        f.write('\n'.join(batch_paths))
+    
+    # Tesseract ends every page with a form feed
+    pages = pytesseract.image_to_string(list_path, lang='eng').split('\f')
+    if len(pages) < len(image_paths):
+        return [_ocr_page(image_path) for image_path in image_paths]
+    return pages[:len(image_paths)]
+
+def _cached_ocr(image_paths: List[str], use_cache: bool) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+    """
+    Look up every page in the OCR cache at once.
+    Returns (cache_keys, cached_texts), one entry per page; keys are None when caching is off.
+    """
+    if not use_cache:
+        return [None] * len(image_paths), [None] * len(image_paths)
+    keys = [ocr_cache.page_key(image_path, OCR_CACHE_VARIANT) for image_path in image_paths]
+    cached = ocr_cache.get_cached_texts(keys)
+    return keys, [cached.get(key) for key in keys]
+
+def _ocr_pages_reversed(image_paths: List[str], use_cache: bool = False,
+                        batch_pages: Optional[int] = OCR_BATCH_PAGES) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_num, text) from the last page to the first.
+    Uncached pages are OCR'd batch_pages at a time in one Tesseract run (see
+    _ocr_page_batch), with up to OCR_WORKERS batches in flight; None splits them
+    into one batch per worker. Batches not yet started are cancelled when the
+    caller stops iterating (e.g. at the stop marker).
+    """
+    keys, texts = _cached_ocr(image_paths, use_cache)
+    # Uncached page indexes, last page first, cut into batches
+    missing = [i for i in reversed(range(len(image_paths))) if texts[i] is None]
+    workers = min(OCR_WORKERS, len(missing)) or 1
+    if batch_pages is None:
+        batch_pages = -(-len(missing) // workers) or 1
+    batches = iter([missing[b:b + batch_pages] for b in range(0, len(missing), batch_pages)])
+    
+    executor = None
+    if workers > 1 and len(missing) > batch_pages:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=_OCR_MP_CONTEXT)
+    window = deque()  # (page indexes, future), in reading order
+    
+    def start_next():
+        for batch in islice(batches, 1):
+            batch_paths = [image_paths[i] for i in batch]
+            if executor is None:
+                future = Future()
+                future.set_result(_ocr_page_batch(batch_paths))
+            else:
+                future = executor.submit(_ocr_page_batch, batch_paths)
+            window.append((batch, future))
+    
+    try:
+        if executor is not None:
+            for _ in range(workers):
+                start_next()
+        for i in reversed(range(len(image_paths))):
+            while texts[i] is None:
+                if not window:
+                    start_next()
+                batch, future = window.popleft()
+                # Keep the window full while this batch is being handled
+                if executor is not None:
+                    start_next()
+                for j, page_text in zip(batch, future.result()):
+                    texts[j] = page_text
+                    if keys[j]:
+                        ocr_cache.set_cached_text(keys[j], page_text)
+            yield i + 1, texts[i]
+    finally:
+        for _, future in window:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown()
+
+def _ocr_text(image_paths: List[str], stop_at_marker: str,
+              use_cache: bool) -> Tuple[str, int, bool]:
+    """
+    OCR rasterized pages in REVERSE order (last to first), stopping at the marker.
+    
+    Returns:
+        Tuple of (text, pages_processed, stopped_early)
+    """
+    text = ""
+    pages_processed = 0
+    stopped_early = False
+    
+    # Without a marker every page is needed, so each worker takes one big batch;
+    # with one, small batches leave little work to waste once it is found
+    batch_pages = OCR_BATCH_PAGES if stop_at_marker else None
+    ocr_pages = _ocr_pages_reversed(image_paths, use_cache, batch_pages)
+    
+    with closing(ocr_pages):
+        for page_num, page_text in ocr_pages:
+            # Check if we've reached the stopping marker
+            if stop_at_marker and stop_at_marker.lower() in page_text.lower():
+                stopped_early = True
+                print(f"[OCR] Stopped at page {page_num} - found '{stop_at_marker}'")
+                break
+            
+            # Add page text
+            if page_text.strip():
+                text += f"\n=== PAGE {page_num} ===\n" + page_text + "\n"
+                pages_processed += 1
+    
+    return text, pages_processed, stopped_early
 
 def extract_text_with_ocr(pdf_path: str, password: Optional[str] = None, 
-                          stop_at_marker: str = "Statement of Accounts") -> Tuple[bool, Optional[str], Optional[str]]:
+                          stop_at_marker: str = "Statement of Accounts",
+                          use_cache: bool = False,
+                          rasterized: Optional[Future] = None) -> Tuple[bool, Optional[str], Optional[str]]:
     """
     Extract text from image-based PDF using OCR.
     Processes pages in REVERSE order (last to first) and stops when marker text is found.
@@ -114,6 +531,10 @@ def extract_text_with_ocr(pdf_path: str, password: Optional[str] = None,
         pdf_path: Path to PDF file
         password: Optional password for protected PDFs
         stop_at_marker: Text marker to stop processing (default: "Statement of Accounts")
+        use_cache: Reuse OCR text for pages seen recently (see utils.ocr_cache).
+            Opt-in, and always off for password-protected PDFs
+        rasterized: Pages already being rasterized by extract_text_from_pdf;
+            skips unlocking and rasterizing (the caller owns the images)
     
     Returns:
         Tuple of (success, extracted_text, error_message)
@@ -122,41 +543,26 @@ def extract_text_with_ocr(pdf_path: str, password: Optional[str] = None,
         return False, None, "OCR libraries not installed. Please install pytesseract and pdf2image."
     
     unlocked_path = None
+    # Never keep text from statements that needed a password
+    use_cache = use_cache and not password
     
     try:
-        # If password provided, unlock first
-        if password:
-            success, unlocked_path, error = unlock_pdf(pdf_path, password)
-            if not success:
-                return False, None, error
-            pdf_to_read = unlocked_path
+        if rasterized is not None:
+            text, pages_processed, stopped_early = _ocr_text(
+                rasterized.result(), stop_at_marker, use_cache)
         else:
-            pdf_to_read = pdf_path
-        
-        # Convert PDF to images (all pages at once for efficiency)
-        images = convert_from_path(pdf_to_read, dpi=300)
-        
-        # Process pages in REVERSE order (last to first)
-        text = ""
-        pages_processed = 0
-        stopped_early = False
-        
-        for i, image in enumerate(reversed(images)):
-            page_num = len(images) - i
-            
-            # Perform OCR on the page
-            page_text = pytesseract.image_to_string(image, lang='eng')
-            
-            # Check if we've reached the stopping marker
-            if stop_at_marker and stop_at_marker.lower() in page_text.lower():
-                stopped_early = True
-                print(f"[OCR] Stopped at page {page_num} - found '{stop_at_marker}'")
-                break
+            # If password provided, unlock first
+            if password:
+                success, unlocked_path, error = unlock_pdf(pdf_path, password)
+                if not success:
+                    return False, None, error
+                pdf_to_read = unlocked_path
+            else:
+                pdf_to_read = pdf_path
             
-            # Add page text
-            if page_text.strip():
-                text += f"\n=== PAGE {page_num} ===\n" + page_text + "\n"
-                pages_processed += 1
+            with tempfile.TemporaryDirectory() as image_dir:
+                text, pages_processed, stopped_early = _ocr_text(
+                    _rasterize_pdf(pdf_to_read, image_dir), stop_at_marker, use_cache)
         
         # Clean up temporary file if created
         if unlocked_path and os.path.exists(unlocked_path):
@@ -182,32 +588,27 @@ def parse_bpi_statement(text: str) -> List[Dict]:
     """Parse BPI credit card statement format (including OCR-extracted text)."""
     transactions = []
     
-    lines = text.split('\n')
+    # Every pass below works on stripped lines, so strip each line once up front
+    lines = tuple(line.strip() for line in text.split('\n'))
     
     # 1. Extract Statement Date/Year
     # Look for "STATEMENT DATE" pattern (e.g., "STATEMENT DATE NOVEMBER 12, 2025")
     statement_year = datetime.now().year
     statement_month_num = datetime.now().month
     
-    for line in lines:  # Check all lines for header info (as Page 1 might be at the end)
-        if "STATEMENT DATE" in line.upper():
-            # Try to find a year in this line
-            year_match = re.search(r'\b20\d{2}\b', line)
-            if year_match:
-                try:
-                    statement_year = int(year_match.group(0))
-                    # Also try to get the month to handle year boundaries correctly
-                    for m_name, m_num in {
-                        'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4, 'MAY': 5, 'JUNE': 6,
-                        'JULY': 7, 'AUGUST': 8, 'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12
-                    }.items():
-                        if m_name in line.upper():
-                            statement_month_num = m_num
-                            break
-                except:
-                    pass
-                # match found, stop searching
-                break
+    # Check all lines for header info (as Page 1 might be at the end)
+    for header_match in _STATEMENT_DATE_LINE_RE.finditer(text):
+        line = header_match.group(0)
+        # Try to find a year in this line
+        year_match = _YEAR_RE.search(line)
+        if year_match:
+            statement_year = int(year_match.group(0))
+            # Also try to get the month to handle year boundaries correctly
+            month_match = _MONTH_RE.search(line)
+            if month_match:
+                statement_month_num = _MONTH_NUM_BY_ABBR[month_match.group(1)[:3].upper()]
+            # match found, stop searching
+            break
 
     # Find where actual transactions start (after "Customer Number" text)
     # This filters out summary tables and extra information
@@ -226,7 +627,7 @@ def parse_bpi_statement(text: str) -> List[Dict]:
     
     # Parse transactions from that point
     for i in range(start_idx, len(lines)):
-        line = lines[i].strip()
+        line = lines[i]
         
         if not line:
             # Empty line resets pending description
@@ -235,8 +636,7 @@ def parse_bpi_statement(text: str) -> List[Dict]:
         
         # Stop at summary sections (end of actual transactions)
         # Note: Don't stop at page boundaries (=== PAGE ===) as transactions may continue across pages
-        if any(stop in line for stop in ['Installment Balance Summary', 'Payment Instructions', 
-                                          'Contact Us', 'KEEP US UPDATED', 'Bank of the Philippine Islands']):
+        if _BPI_STOP_RE.search(line):
             break
         
         # Check for section markers
@@ -254,20 +654,16 @@ def parse_bpi_statement(text: str) -> List[Dict]:
             continue
         
         # Skip summary lines and headers
-        if any(skip in line for skip in ['Payment -', 'Finance Charge', 'Previous Balance', 
-                                          'Past Due', 'Ending Balance', 'Unbilled', 
-                                          'Total', 'Transaction', 'Post Date', 
-                                          'Purchase Amount', 'Remaining', 'Date', 'Last Payment']):
+        if _BPI_SKIP_RE.search(line):
             pending_description = None
             continue
         
         # Pattern: Description followed by amount at the end
-        # Amount is always at the end: digits with optional comma and 2 decimal places
-        amount_pattern = r'(.+?)\s+([\d,]+\.\d{2})$'
-        match = re.search(amount_pattern, line)
+        # Amount is always the last token: digits with optional comma and 2 decimal places
+        tokens = line.rsplit(None, 1)
         
-        if match:
-            description, amount_str = match.groups()
+        if len(tokens) == 2 and _is_amount_only(tokens[1]):
+            description, amount_str = tokens
             description = description.strip()
             
             # If we have a pending description from previous line, combine them
@@ -298,7 +694,7 @@ def parse_bpi_statement(text: str) -> List[Dict]:
             # No amount on this line - might be first part of multi-line transaction
             # Only save as pending if the line doesn't contain date patterns
             # (lines with dates are likely transaction lines that got split)
-            has_date = re.search(r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}', line)
+            has_date = _HAS_MONTH_DAY_RE.search(line)
             if line and len(line) > 3 and not has_date:
                 pending_description = line
             else:
@@ -306,126 +702,97 @@ def parse_bpi_statement(text: str) -> List[Dict]:
     
     # Post-processing: Handle continuation pages where merchants and amounts are in separate sections
     # This happens on some pages where the format is: merchants, then "Statement of Account", then amounts
-    for i in range(len(lines)):
-        if '=== PAGE' in lines[i]:
-            merchants = []
-            merchants_dates = [] # Store extracted date for each merchant
-            amounts = []
+    # Page markers are located once; each page's scan ends at the next marker
+    page_starts = _page_marker_lines(text)
+    page_ends = page_starts[1:] + [len(lines)]
+    for i, page_end in zip(page_starts, page_ends):
+        merchants = []
+        merchants_dates = [] # Store extracted date for each merchant
+        amounts = []
+        
+        # Collect potential merchants (lines with text but no amount pattern)
+        for j in range(i+1, min(i+100, page_end)): # Increased lookahead
+            line = lines[j]
             
-            # Collect potential merchants (lines with text but no amount pattern)
-            for j in range(i+1, min(i+100, len(lines))): # Increased lookahead
-                line = lines[j].strip()
-                
-                # Stop if we hit the next page
-                if '===' in line and 'PAGE' in line:
-                    break
+            # Stop if we hit the next page
+            if '===' in line and 'PAGE' in line:
+                break
+            
+            # Skip empty lines
+            if not line:
+                continue
+            
+            # Check if line looks like a merchant
+            # CRITICAL FIX: In split-column mode, merchant lines MUST start with a date (Month Day)
+            # This filters out labels like "Finance Charge", "Previous Balance" etc.
+            # (a line starting with a month name can never be a bare amount)
+            date_match = _MONTH_DAY_RE.match(line)
+            
+            if (line and len(line) > 3 and 
+                date_match and # MUST have a date
+                not _BPI_PAGE_SKIP_RE.search(line)):
                 
-                # Skip empty lines
-                if not line:
-                    continue
+                # Store merchant and its date
+                merchants.append(line)
                 
-                # Check if line looks like a merchant
-                # CRITICAL FIX: In split-column mode, merchant lines MUST start with a date (Month Day)
-                # This filters out labels like "Finance Charge", "Previous Balance" etc.
-                date_match = re.match(r'^(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2})', line, re.IGNORECASE)
+                # Parse the date
+                m_name = date_match.group(1).upper()
+                day = int(date_match.group(2))
+                month_num = _MONTH_NUM.get(m_name, statement_month_num)
                 
-                if (line and len(line) > 3 and 
-                    not re.match(r'^[\d,]+\.\d{2}$', line) and
-                    date_match and # MUST have a date
-                    not any(skip in line for skip in ['BPI Credit Cards', 'Customer Number', 'Transaction', 'Post Date', 'BPI REWARDS', 'Statement of Account'])):
+                # Logic to handle year rollovers (e.g. statement Jan 2026, trans Dec 25)
+                trans_year = statement_year
+                if statement_month_num == 1 and month_num == 12:
+                    trans_year = statement_year - 1
                     
-                    # Store merchant and its date
-                    merchants.append(line)
+                merchants_dates.append(f"{trans_year}-{month_num:02d}-{day:02d}")
+            
+            # After collecting merchants, look for "Statement of Account" marker
+            # This should appear after the merchants and before the amounts
+            if 'Statement of Account' in line and len(merchants) > 0:
+                # Start collecting amounts after this marker
+                for k in range(j+1, min(j+30, len(lines))):
+                    amount_line = lines[k]
+                    # Amounts are usually contiguous; other lines are ignored
+                    if _is_amount_only(amount_line):
+                        amounts.append(amount_line)
+                break
+        
+        # If we found matching merchants (and enough amounts), add them as transactions
+        # We assume transaction amounts come first, followed by summary amounts (Finance Charge, etc.)
+        if merchants and amounts and len(amounts) >= len(merchants):
+            # Only take the first len(merchants) amounts
+            valid_amounts = amounts[:len(merchants)]
+            
+            for i in range(len(merchants)):
+                try:
+                    amount = float(amounts[i].replace(',', ''))
                     
-                    # Parse the date
-                    m_name = date_match.group(1).upper()
-                    day = int(date_match.group(2))
-                    month_num = {
-                        'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4, 'MAY': 5, 'JUNE': 6,
-                        'JULY': 7, 'AUGUST': 8, 'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12
-                    }.get(m_name, statement_month_num)
+                    # Clean up description (remove date from start if present, though sometimes it's nice to keep)
+                    # The regex matched the date at start, let's keep it as part of description or remove?
+                    # Usually description cleanup helps.
+                    # But `merchants[i]` is the full line.
                     
-                    # Logic to handle year rollovers (e.g. statement Jan 2026, trans Dec 25)
-                    trans_year = statement_year
-                    if statement_month_num == 1 and month_num == 12:
-                        trans_year = statement_year - 1
-                        
-                    merchants_dates.append(f"{trans_year}-{month_num:02d}-{day:02d}")
-                
-                # After collecting merchants, look for "Statement of Account" marker
-                # This should appear after the merchants and before the amounts
-                if 'Statement of Account' in line and len(merchants) > 0:
-                    # Start collecting amounts after this marker
-                    for k in range(j+1, min(j+30, len(lines))):
-                        amount_line = lines[k].strip()
-                        if re.match(r'^[\d,]+\.\d{2}$', amount_line):
-                            amounts.append(amount_line)
-                        elif amount_line and '===' not in amount_line and not re.match(r'^[\d,]+\.\d{2}$', amount_line):
-                             # Stop if we hit non-amount text (unless it looks like a total or something we can skip)
-                             # But usually amounts are contiguous
-                             # If we encounter a labeled line, stop.
-                             pass
-                    break
-            
-            # If we found matching merchants (and enough amounts), add them as transactions
-            # We assume transaction amounts come first, followed by summary amounts (Finance Charge, etc.)
-            if merchants and amounts and len(amounts) >= len(merchants):
-                # Only take the first len(merchants) amounts
-                valid_amounts = amounts[:len(merchants)]
-                
-                for i in range(len(merchants)):
-                    try:
-                        amount = float(amounts[i].replace(',', ''))
-                        
-                        # Clean up description (remove date from start if present, though sometimes it's nice to keep)
-                        # The regex matched the date at start, let's keep it as part of description or remove?
-                        # Usually description cleanup helps.
-                        # But `merchants[i]` is the full line.
-                        
-                        transactions.append({
-                            'date': merchants_dates[i],
-                            'description': merchants[i], # Cleaned description
-                            'amount': amount
-                        })
-                    except:
-                        continue
+                    transactions.append({
+                        'date': merchants_dates[i],
+                        'description': merchants[i], # Cleaned description
+                        'amount': amount
+                    })
+                except:
+                    continue
     
     return transactions
 
 def parse_unionbank_statement(text: str) -> List[Dict]:
     """Parse UnionBank credit card statement format."""
     transactions = []
-    
-    # UnionBank statements often include a transaction table, but PDFs can contain other
-    # sections with similar date-like patterns. To avoid false positives, we parse
-    # line-by-line and require the *entire* line to match a strict structure.
-    #
-    # Expected format (common):
-    #   11/02/25 11/04/25 SHOPEE PH, MANDALUYONG PHP 220.00
-    # Amount may be negative, may have commas, and may omit the PHP token.
-    line_pattern = re.compile(
-        r'^\s*'
-        r'(?P<trx_date>\d{2}/\d{2}/\d{2})\s+'
-        r'(?P<post_date>\d{2}/\d{2}/\d{2})\s+'
-        r'(?P<desc>.+?)\s+'
-        r'(?:(?P<ccy>PHP)\s+)?'
-        r'(?P<amt>-?[\d,]+\.\d{2})'
-        r'\s*$'
-    )
-
-    skip_keywords = [
-        'BALANCE', 'SUBTOTAL', 'TOTAL', 'AMOUNT DUE',
-        'CREDIT LIMIT', 'AVAILABLE', 'POINTS', 'STATEMENT DATE',
-        'FINANCE CHARGE', 'REWARDS VISA PLATINUM', 'CARD NO',
-        'MINIMUM AMOUNT DUE', 'PREVIOUS BALANCE', 'ENDING BALANCE'
-    ]
 
     for raw_line in text.splitlines():
         line = raw_line.strip()
         if not line:
             continue
 
-        m = line_pattern.match(line)
+        m = _UB_LINE_RE.match(line)
         if not m:
             continue
 
@@ -437,10 +804,10 @@ def parse_unionbank_statement(text: str) -> List[Dict]:
             continue
         
         # Skip header/summary lines (more specific checks)
-        if any(keyword in description.upper() for keyword in skip_keywords):
+        if _UB_SKIP_RE.search(description):
             continue
         # Skip lines that look like statement headers (start with common patterns)
-        if description.upper().startswith(('STATEMENT', 'PAGE', 'TRANSACTION')):
+        if _UB_HEADER_RE.match(description):
             continue
 
         try:
@@ -466,74 +833,54 @@ def parse_generic_statement(text: str) -> List[Dict]:
     """Generic parser for common statement formats."""
     transactions = []
     
-    # Keywords to skip (headers, summaries, example tables)
-    skip_keywords = [
-        'PAYMENT', 'BALANCE', 'SUBTOTAL', 'TOTAL', 'AMOUNT DUE',
-        'CREDIT LIMIT', 'AVAILABLE', 'POINTS', 'STATEMENT DATE',
-        'FINANCE CHARGE', 'DATE POST', 'DESCRIPTION AMOUNT',
-        'MINIMUM AMOUNT DUE', 'PREVIOUS BALANCE', 'ENDING BALANCE',
-        'POST DATE TRANSACTION', 'CARD NO', 'INTEREST RATE',
-        'STATEMENT SUMMARY', 'OVERLIMIT', 'DEBITS CREDITS'
-    ]
-    
-    # Try multiple common patterns
-    patterns = [
-        r'(\d{2}/\d{2}/\d{4})\s+([A-Z0-9\s\-\.\,\&\/]+?)\s+([\d,]+\.\d{2})',  # MM/DD/YYYY
-        r'(\d{4}-\d{2}-\d{2})\s+([A-Z0-9\s\-\.\,\&\/]+?)\s+([\d,]+\.\d{2})',  # YYYY-MM-DD
-        r'(\d{2}/\d{2})\s+([A-Z0-9\s\-\.\,\&\/]+?)\s+([\d,]+\.\d{2})',        # MM/DD
-    ]
-    
-    for pattern in patterns:
-        for match in re.finditer(pattern, text):
-            groups = match.groups()
-            if len(groups) == 3:
-                date_str, description, amount_str = groups
-                
-                # Clean up description
-                description = description.strip()
-                
-                # Skip if description is too short or contains skip keywords
-                if len(description) < 3:
-                    continue
-                if any(keyword in description.upper() for keyword in skip_keywords):
-                    continue
-                
-                # Parse amount
-                try:
-                    amount = float(amount_str.replace(',', ''))
-                except:
-                    continue
-                
-                # Skip negative amounts (credits, refunds, payments)
-                if amount < 0:
-                    continue
-                
-                # Skip very large round numbers that look like examples (20000, 19500, etc.)
-                if amount > 10000 and amount % 100 == 0:
-                    continue
-                
-                # Parse date
-                try:
-                    if '/' in date_str and len(date_str.split('/')) == 2:
-                        # MM/DD format
-                        month, day = date_str.split('/')
-                        current_year = datetime.now().year
-                        date = f"{current_year}-{month.zfill(2)}-{day.zfill(2)}"
-                    elif '/' in date_str:
-                        # MM/DD/YYYY format
-                        date_obj = datetime.strptime(date_str, '%m/%d/%Y')
-                        date = date_obj.strftime('%Y-%m-%d')
-                    else:
-                        # YYYY-MM-DD format
-                        date = date_str
-                except:
-                    continue
-                
-                transactions.append({
-                    'date': date,
-                    'description': description,
-                    'amount': amount
-                })
+    current_year = datetime.now().year
+    
+    # Try all common patterns in a single scan
+    for match in _GENERIC_TRANSACTION_RE.finditer(text):
+        # Clean up description
+        description = match.group('description').strip()
+        
+        # Skip if description is too short or contains skip keywords
+        if len(description) < 3:
+            continue
+        if _GENERIC_SKIP_RE.search(description):
+            continue
+        
+        # Parse amount
+        try:
+            amount = float(match.group('amount').replace(',', ''))
+        except:
+            continue
+        
+        # Skip negative amounts (credits, refunds, payments)
+        if amount < 0:
+            continue
+        
+        # Skip very large round numbers that look like examples (20000, 19500, etc.)
+        if amount > 10000 and amount % 100 == 0:
+            continue
+        
+        # Parse date
+        try:
+            if match.group('md'):
+                # MM/DD format
+                month, day = match.group('md').split('/')
+                date = f"{current_year}-{month.zfill(2)}-{day.zfill(2)}"
+            elif match.group('mdy'):
+                # MM/DD/YYYY format
+                date_obj = datetime.strptime(match.group('mdy'), '%m/%d/%Y')
+                date = date_obj.strftime('%Y-%m-%d')
+            else:
+                # YYYY-MM-DD format
+                date = match.group('ymd')
+        except:
+            continue
+        
+        transactions.append({
+            'date': date,
+            'description': description,
+            'amount': amount
+        })
     
     return transactions
 
@@ -559,13 +906,11 @@ def extract_transactions(pdf_path: str, password: Optional[str] = None,
     # Try to parse based on bank type
     transactions = []
     
-    # Check for bank type in text (case-insensitive)
-    text_upper = text.upper()
-    
-    # Check UnionBank FIRST (more specific), then BPI (more general)
-    if bank_type == "unionbank" or (bank_type == "auto" and ("UNIONBANK" in text_upper or "UNION BANK" in text_upper)):
+    # Check UnionBank FIRST (more specific), then BPI (more general).
+    # Detection is case-insensitive and only scans the text when bank_type is "auto"
+    if bank_type == "unionbank" or (bank_type == "auto" and _UNIONBANK_RE.search(text)):
         transactions = parse_unionbank_statement(text)
-    elif bank_type == "bpi" or (bank_type == "auto" and ("BPI" in text_upper or "BANK OF THE PHILIPPINE ISLANDS" in text_upper)):
+    elif bank_type == "bpi" or (bank_type == "auto" and _BPI_RE.search(text)):
         transactions = parse_bpi_statement(text)
     
     # If bank-specific parser found transactions (even just a few), use them